@@ -0,0 +1,64 @@
+"""
+Compare GENIA execution engines on seq.genia-style workloads.
+
+Runs reduce/map/filter pipelines built from the GENIA definitions in
+scripts/seq.genia under each engine and reports the best time of several
+runs.  Scripts are parsed once outside the timed region, so the numbers
+cover execution only.
+
+Usage:
+    python benchmarks/engines.py [n] [engine ...]
+"""
+
+import copy
+import gc
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from genia.interpreter import GENIAInterpreter, Interpreter
+
+SEQ_PATH = Path(__file__).resolve().parent.parent / 'scripts' / 'seq.genia'
+SEQ_FUNCTIONS = SEQ_PATH.read_text().split('define inc')[0]
+
+WORKLOADS = {
+    "reduce": "reduce(define(acc, x) -> acc + x * 2, 0, 1..{n})",
+    "map": "count(map(define(x) -> x * x, 1..{n}))",
+    "filter": "count(filter(define(x) -> x - x / 3 * 3 == 0, 1..{n}))",
+    "pipeline": "reduce(+, 0, map(define(x) -> x * 2, filter(define(x) -> x > 10, 1..{n})))",
+}
+
+
+def time_workload(engine, ast, repeat=5):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        tree = copy.deepcopy(ast)
+        interpreter = Interpreter(engine=engine)
+        gc.collect()
+        start = time.perf_counter()
+        result = interpreter.execute(tree)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main(n, engines):
+    print(f"{'workload':<10}" + "".join(f"{engine + ' (s)':>14}" for engine in engines))
+    for name, workload in WORKLOADS.items():
+        ast = GENIAInterpreter().parse(SEQ_FUNCTIONS + "\n" + workload.format(n=n) + "\n")
+        timings = []
+        results = set()
+        for engine in engines:
+            elapsed, result = time_workload(engine, ast)
+            timings.append(elapsed)
+            results.add(repr(result))
+        if len(results) != 1:
+            raise AssertionError(f"engines disagree on {name}: {results}")
+        print(f"{name:<10}" + "".join(f"{t:>14.3f}" for t in timings))
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    main(n, sys.argv[2:] or list(Interpreter.ENGINES))
@@ -0,0 +1,65 @@
+"""
+Parse-throughput benchmark for large generated GENIA scripts.
+
+Generates scripts of increasing statement counts and reports the time taken
+to lex and parse each one.  Linear scaling shows up as a roughly constant
+time per statement across sizes.  Lexing and parsing are reported
+separately; at these sizes lexing takes longer than parsing.
+
+Usage:
+    python benchmarks/parse_throughput.py [statements ...]
+"""
+
+import gc
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from genia.lexer import Lexer
+from genia.parser import Parser
+
+STATEMENT_KINDS = [
+    "x{i} = {i} + 1",
+    "[a{i}, ..r{i}] = [{i}, 2, 3]",
+    "define f{i}(n, [h, ..t]) when n > 0 -> f{i}(n - 1, t) | (_, _) -> {i}",
+    "print(\"line\", x{i}, {i}..{i})",
+    "(y{i} = {i}; y{i} * 2)",
+]
+
+
+def generate(statements):
+    lines = []
+    for i in range(statements):
+        lines.append(STATEMENT_KINDS[i % len(STATEMENT_KINDS)].format(i=i))
+    return "\n".join(lines) + "\n"
+
+
+def time_parse(code, repeat=3):
+    """
+    Return the best (lex, parse) times over ``repeat`` runs.
+    """
+    best_lex = best_parse = float("inf")
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        tokens = list(Lexer(code).tokenize())
+        lexed = time.perf_counter()
+        Parser(tokens).parse()
+        parsed = time.perf_counter()
+        best_lex = min(best_lex, lexed - start)
+        best_parse = min(best_parse, parsed - lexed)
+    return best_lex, best_parse
+
+
+def main(sizes):
+    print(f"{'statements':>10} {'lex (s)':>9} {'parse (s)':>10} {'lex us/stmt':>12} {'parse us/stmt':>14}")
+    for size in sizes:
+        lex_time, parse_time = time_parse(generate(size))
+        print(f"{size:>10} {lex_time:>9.3f} {parse_time:>10.3f} "
+              f"{lex_time / size * 1e6:>12.1f} {parse_time / size * 1e6:>14.1f}")
+
+
+if __name__ == "__main__":
+    main([int(a) for a in sys.argv[1:]] or [10_000, 20_000, 40_000, 80_000])
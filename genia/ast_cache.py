@@ -0,0 +1,151 @@
+# genia/ast_cache.py
+
+import hashlib
+import marshal
+import os
+import sys
+from pathlib import Path
+
+# Bump whenever the lexer or parser changes the shape of the AST so stale
+# cache entries are never loaded.
+FORMAT_VERSION = 2
+
+# Disk entries kept per cache directory; the least recently used are removed
+# once a store pushes the count past this.
+MAX_ENTRIES = 256
+
+
+def default_cache_dir():
+    """
+    Return the directory used for cached ASTs.
+
+    ``GENIA_CACHE_DIR`` wins, then ``$XDG_CACHE_HOME/genia`` and finally
+    ``~/.cache/genia``.
+    """
+    if os.environ.get("GENIA_CACHE_DIR"):
+        return Path(os.environ["GENIA_CACHE_DIR"])
+    base = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(base) / "genia"
+
+
+class ASTCache:
+    """
+    Content-addressed cache of parsed GENIA programs.
+
+    Entries are keyed by a SHA-256 of the source text and stored with
+    :mod:`marshal`, which handles the plain dict/list/str/int trees produced
+    by :class:`genia.parser.Parser` and loads much faster than re-lexing and
+    re-parsing.  Entries are kept in memory and, when ``directory`` is given,
+    on disk so that short-lived processes can share them.
+
+    Every ``load`` returns a fresh copy of the AST, so callers are free to
+    annotate or mutate the tree they get back.
+
+    The disk cache holds at most ``max_entries`` entries.  Loading an entry
+    refreshes its modification time and ``store`` evicts the oldest ones.
+    """
+
+    def __init__(self, directory=None, max_entries=MAX_ENTRIES):
+        self.directory = Path(directory) if directory else None
+        self.max_entries = max_entries
+        self._memory = {}
+
+    def key(self, code):
+        """
+        Return the cache key for ``code``.
+        """
+        digest = hashlib.sha256()
+        digest.update(f"genia-ast:{FORMAT_VERSION}:{sys.version_info[0]}.{sys.version_info[1]}\0".encode())
+        digest.update(code.encode("utf-8"))
+        return digest.hexdigest()
+
+    def path_for(self, key):
+        return self.directory / key[:2] / f"{key}.ast"
+
+    def load(self, code):
+        """
+        Return the cached AST for ``code`` or ``None`` on a miss.
+        Unreadable or corrupt entries are treated as misses.
+        """
+        key = self.key(code)
+        data = self._memory.get(key)
+        if data is None and self.directory is not None:
+            path = self.path_for(key)
+            try:
+                data = path.read_bytes()
+                os.utime(path)
+            except OSError:
+                return None
+        if data is None:
+            return None
+        try:
+            ast = marshal.loads(data)
+        except (EOFError, ValueError, TypeError):
+            return None
+        if not isinstance(ast, list):
+            return None
+        self._memory[key] = data
+        return ast
+
+    def store(self, code, ast):
+        """
+        Store ``ast`` as the parse of ``code``.  Failures to write the disk
+        entry are ignored; the cache is an optimisation only.
+        """
+        try:
+            data = marshal.dumps(ast)
+        except ValueError:
+            return
+        key = self.key(code)
+        self._memory[key] = data
+        if self.directory is None:
+            return
+        path = self.path_for(key)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path.write_bytes(data)
+            os.replace(tmp_path, path)
+        except OSError:
+            try:
+                tmp_path.unlink()
+            except OSError:
+                pass
+            return
+        self.prune()
+
+    def entries(self):
+        """
+        Return the disk entries as ``(mtime, path)`` pairs, oldest first.
+        """
+        if self.directory is None:
+            return []
+        entries = []
+        for path in self.directory.glob("*/*.ast"):
+            try:
+                entries.append((path.stat().st_mtime, path))
+            except OSError:
+                pass
+        return sorted(entries)
+
+    def prune(self):
+        """
+        Remove the least recently used disk entries beyond ``max_entries``.
+        """
+        entries = self.entries()
+        for _, path in entries[:max(0, len(entries) - self.max_entries)]:
+            try:
+                path.unlink()
+            except OSError:
+                pass
+
+    def clear(self):
+        """
+        Remove every cached entry, in memory and on disk.
+        """
+        self._memory.clear()
+        for _, path in self.entries():
+            try:
+                path.unlink()
+            except OSError:
+                pass
@@ -0,0 +1,199 @@
+# genia/closures.py
+
+"""
+Closure-compilation backend for GENIA.
+
+Each AST node is converted once into a zero-argument Python callable that
+computes the node's value.  Child evaluators are captured directly in the
+closures, so evaluating a compiled body performs no dict lookups on the
+node, no ``f"eval_{type}"`` method names and no ``getattr``.
+
+Function guards and bodies are compiled when their function's dispatch
+table is built and kept on the :class:`~genia.interpreter.Clause`, which
+calls them directly.  Node types without a dedicated compiler fall back to
+the tree walker for that node only.
+"""
+
+from genia.interpreter import Delay, Interpreter, TailCall
+from genia.vector import list_literal
+
+
+class ClosureCompiler:
+    """
+    Compiles AST nodes into Python closures bound to ``interpreter``.
+    ``evaluate`` is a drop-in replacement for ``Interpreter.evaluate``.
+    """
+
+    def __init__(self, interpreter):
+        self.interpreter = interpreter
+
+    def evaluate(self, node):
+        return self.compile(node)()
+
+    def compile(self, node):
+        method = getattr(self, f"compile_{node['type']}", None)
+        if method is None:
+            return self.compile_fallback(node)
+        return method(node)
+
+    def compile_fallback(self, node):
+        interp = self.interpreter
+        tree_evaluate = Interpreter.evaluate
+        return lambda: tree_evaluate(interp, node)
+
+    def compile_number(self, node):
+        value = int(node['value'])
+        return lambda: value
+
+    def compile_string(self, node):
+        value = node['value']
+        return lambda: value
+
+    compile_raw_string = compile_string
+    compile_constant = compile_string
+    compile_number_literal = compile_string
+    compile_string_literal = compile_string
+
+    def compile_identifier(self, node):
+        interp = self.interpreter
+        if 'address' in node:
+            return self.compile_local(node)
+        env_stack = interp.env_stack
+        functions = interp.functions
+        name = node['value']
+
+        def identifier():
+            env = env_stack[-1]
+            if name in env:
+                value = env[name]
+            elif name in functions:
+                value = functions[name]
+            else:
+                return interp.eval_identifier(node)
+            while isinstance(value, Delay):
+                value = value.value(interp)
+            return value
+        return identifier
+
+    def compile_local(self, node):
+        """
+        Read a function local from its frame slot (see genia.resolver).
+        """
+        interp = self.interpreter
+        depth, slot = node['address']
+
+        if depth == 0:
+            def local():
+                value = interp.frame[slot]
+                while isinstance(value, Delay):
+                    value = value.value(interp)
+                return value
+            return local
+
+        def outer():
+            frame = interp.frame
+            for _ in range(depth):
+                frame = frame[0]
+            value = frame[slot]
+            while isinstance(value, Delay):
+                value = value.value(interp)
+            return value
+        return outer
+
+    def compile_expression_statement(self, node):
+        return self.compile(node['expression'])
+
+    def compile_grouped_statements(self, node):
+        statements = tuple(self.compile(statement) for statement in node['statements'])
+
+        def grouped():
+            result = None
+            for statement in statements:
+                result = statement()
+            return result
+        return grouped
+
+    def compile_assignment(self, node):
+        assign = self.interpreter.assign
+        pattern = node['pattern']
+        value = self.compile(node['value'])
+        return lambda: assign(pattern, value())
+
+    def compile_operator(self, node):
+        op = node['operator']
+        if op not in ('+', '-', '*', '/', '..', '~'):
+            return self.compile_fallback(node)
+        left = self.compile(node['left'])
+        right = self.compile(node['right'])
+        # Right operand first for arithmetic and ranges, matching the tree walker
+        if op == '+':
+            def add():
+                r = right()
+                return left() + r
+            return add
+        if op == '-':
+            def sub():
+                r = right()
+                return left() - r
+            return sub
+        if op == '*':
+            def mul():
+                r = right()
+                return left() * r
+            return mul
+        binary_operation = self.interpreter.binary_operation
+        if op == '~':
+            def match():
+                l = left()
+                return binary_operation(op, l, right(), node)
+            return match
+
+        def operator():
+            r = right()
+            return binary_operation(op, left(), r, node)
+        return operator
+
+    def compile_comparator(self, node):
+        comparison = self.interpreter.comparison
+        op = node['operator']
+        left = self.compile(node['left'])
+        right = self.compile(node['right'])
+
+        def compare():
+            l = left()
+            return comparison(op, l, right(), node)
+        return compare
+
+    def compile_unary_operator(self, node):
+        unary_operation = self.interpreter.unary_operation
+        op = node['operator']
+        operand = self.compile(node['operand'])
+        return lambda: unary_operation(op, operand(), node)
+
+    def compile_list(self, node):
+        elements = tuple(self.compile(element) for element in node['elements'])
+        spreads = tuple(element['type'] == 'unary_operator' and element['operator'] == '..'
+                        for element in node['elements'])
+        return lambda: list_literal([element() for element in elements], spreads)
+
+    def compile_function_call(self, node):
+        interp = self.interpreter
+        resolve_function = interp.resolve_function
+        call_function = interp.call_function
+        arguments = tuple(self.compile(argument) for argument in node['arguments'])
+        node_context = (node.get('line'), node.get('column'))
+
+        if node.get('is_tail_call', False):
+            def tail_call():
+                func = resolve_function(node)
+                return TailCall(func=func, args=[a() for a in arguments], node_context=node_context)
+            return tail_call
+
+        def call():
+            func = resolve_function(node)
+            return call_function(func, [a() for a in arguments], node_context)
+        return call
+
+    def compile_function_definition(self, node):
+        eval_function_definition = self.interpreter.eval_function_definition
+        return lambda: eval_function_definition(node)
@@ -0,0 +1,105 @@
+# genia/hosted/sequences.py
+
+"""
+Native versions of the core sequence functions.
+
+``reduce``, ``map``, ``filter``, ``count``, ``take``, ``reverse``, ``any?``
+and ``every?`` have the names, arities and curried forms of the GENIA
+definitions in ``scripts/seq.genia``, but loop in Python instead of
+recursing through pattern-matched clauses.  They accept lists, vectors,
+ranges, ``LazySeq`` and ``Sequence`` values and return vectors.
+
+Each function takes the interpreter first; :func:`register` binds it.
+Callbacks are called through :meth:`genia.interpreter.Interpreter.callback`.
+The functions are registered as hosted definitions, so a script that
+defines one of these names with the same arity replaces the native
+version, and other arities extend it.
+"""
+
+from functools import partial
+from itertools import islice
+
+from genia.interpreter import as_list_protocol, iter_list_protocol
+from genia.ranges import Range
+from genia.vector import Buffer, Vector
+
+
+def _items(name, values):
+    """Return an iterable over the elements of a GENIA list-like value."""
+    kind = type(values)
+    if kind is list or kind is Vector or kind is Range:
+        return values
+    try:
+        return iter_list_protocol(as_list_protocol(values))
+    except TypeError:
+        raise RuntimeError(f"{name} expects a list, got {type(values).__name__}") from None
+
+
+def seq_reduce(interpreter, func, acc, values):
+    call = interpreter.callback(func, 2)
+    for value in _items("reduce", values):
+        acc = call(acc, value)
+    return acc
+
+
+def seq_map(interpreter, func, values):
+    return Vector(Buffer(map(interpreter.callback(func, 1), _items("map", values))))
+
+
+def seq_filter(interpreter, pred, values):
+    return Vector(Buffer(filter(interpreter.callback(pred, 1), _items("filter", values))))
+
+
+def seq_count(interpreter, values):
+    if type(values) in (list, Vector, Range):
+        return len(values)
+    return sum(1 for _ in _items("count", values))
+
+
+def seq_take(interpreter, n, values):
+    # Stops after n elements, so infinite sequences are fine
+    return Vector(Buffer(islice(_items("take", values), max(n, 0))))
+
+
+def seq_reverse(interpreter, values):
+    return Vector(Buffer(reversed(values) if type(values) in (list, Vector, Range)
+                         else reversed(list(_items("reverse", values)))))
+
+
+def seq_any(interpreter, pred, values):
+    call = interpreter.callback(pred, 1)
+    return any(call(value) for value in _items("any?", values))
+
+
+def seq_every(interpreter, pred, values):
+    call = interpreter.callback(pred, 1)
+    return all(call(value) for value in _items("every?", values))
+
+
+# name -> (function, parameters, curried parameters)
+FUNCTIONS = {
+    "reduce": (seq_reduce, ["f", "acc", "list"], ["f", "acc"]),
+    "map": (seq_map, ["f", "list"], ["f"]),
+    "filter": (seq_filter, ["pred", "list"], ["pred"]),
+    "count": (seq_count, ["list"], None),
+    "take": (seq_take, ["n", "seq"], ["n"]),
+    "reverse": (seq_reverse, ["list"], []),
+    "any?": (seq_any, ["pred", "list"], ["pred"]),
+    "every?": (seq_every, ["pred", "list"], ["pred"]),
+}
+
+
+def _curry(function):
+    def curried(*args):
+        return lambda values: function(*args, values)
+    return curried
+
+
+def register(interpreter):
+    """Register the sequence functions with ``interpreter`` as hosted
+    functions, including the curried forms that omit the list."""
+    for name, (function, parameters, curried) in FUNCTIONS.items():
+        bound = partial(function, interpreter)
+        interpreter.register_foreign_function(name, bound, parameters=parameters, hosted=True)
+        if curried is not None:
+            interpreter.register_foreign_function(name, _curry(bound), parameters=curried, hosted=True)
@@ -4,6 +4,7 @@ from genia.lazy_seq import LazySeq
 from collections import deque
 from itertools import islice
 from functools import reduce
+import os
 import sys
 import re
 import copy
@@ -15,10 +16,15 @@ import genia
 from genia.lazy_seq import lazyseq
 from genia.lexer import Lexer
 from genia.parser import Parser
-from genia.seq import delay_seq, Sequence, nth_seq
+from genia.optimizer import Optimizer
+from genia.resolver import Resolver
+from genia.seq import delay_seq, Sequence
+from genia.ranges import Range
+from genia.vector import Vector, list_literal, materialize
 from genia.hosted.os import files_in_paths
 from genia.hosted.random_utils import randrange
 import importlib
+import operator
 from typing import Protocol, runtime_checkable, Any
 
 
@@ -53,7 +59,7 @@ class ListAdapter:
         return self.data[index]
 
     def tail(self, start: int = 1):
-        return self.data[start:]
+        return Vector(self.data, start)
 
     def to_list(self) -> list:
         return list(self.data)
@@ -85,17 +91,27 @@ class SequenceAdapter:
         self.seq = seq
 
     def head(self, index: int = 0):
+        s = self.seq
         try:
-            return nth_seq(index, self.seq)
+            while isinstance(s, Sequence):
+                if s.is_empty():
+                    raise IndexError("index out of range")
+                if index == 0:
+                    return s.first()
+                s = s.rest()
+                index -= 1
+            return s[index]
+        except IndexError:
+            raise
         except Exception as e:
             raise IndexError("index out of range") from e
 
     def tail(self, start: int = 1):
         s = self.seq
-        for _ in range(start):
+        for i in range(start):
+            if isinstance(s, (list, Vector, Range)):
+                return s[start - i:]
             s = s.rest()
-            if isinstance(s, list):
-                break
         return s
 
     def to_list(self) -> list:
@@ -104,7 +120,7 @@ class SequenceAdapter:
         while isinstance(s, Sequence) and not s.is_empty():
             out.append(s.first())
             s = s.rest()
-        if isinstance(s, list):
+        if isinstance(s, (list, Vector, Range)):
             out.extend(s)
         return out
 
@@ -112,7 +128,8 @@ class SequenceAdapter:
 def as_list_protocol(value) -> ListProtocol:
     """Return a :class:`ListProtocol` adapter for ``value``."""
 
-    if isinstance(value, ListProtocol):
+    # Concrete types first: the runtime Protocol check is comparatively slow
+    if type(value) is Vector or type(value) is Range:
         return value
     if isinstance(value, list):
         return ListAdapter(value)
@@ -120,17 +137,59 @@ def as_list_protocol(value) -> ListProtocol:
         return LazySeqAdapter(value)
     if isinstance(value, Sequence):
         return SequenceAdapter(value)
+    if isinstance(value, ListProtocol):
+        return value
     raise TypeError(f"Unsupported list type: {type(value).__name__}")
 
 
-def _is_spread(element: dict) -> bool:
-    return (
-        (element.get("type") == "unary_operator" and element.get("operator") == "..")
-        or element.get("type") == "rest"
-    )
+def list_prefix(adapter: ListProtocol, count: int, exact: bool = False):
+    """Return the first ``count`` elements of ``adapter`` as a list.
+
+    Returns ``None`` if there are fewer than ``count`` elements or, when
+    ``exact`` is true, more than ``count``.  Only ``count + 1`` elements
+    are ever touched, so lazy and infinite sequences are not forced.
+    """
+    values = list(islice(iter_list_protocol(adapter), count + 1 if exact else count))
+    if len(values) != count:
+        return None
+    return values
+
+
+def iter_list_protocol(adapter: ListProtocol):
+    """Iterate over the elements of ``adapter`` one at a time.
+
+    ``Sequence`` values are walked with ``first``/``rest`` and ``LazySeq``
+    values are iterated directly, so a full scan is linear.  Other
+    :class:`ListProtocol` implementations are read with ``head(i)``.
+    """
+    if isinstance(adapter, ListAdapter):
+        yield from adapter.data
+    elif type(adapter) is Vector or type(adapter) is Range:
+        yield from adapter
+    elif isinstance(adapter, LazySeqAdapter):
+        yield from adapter.seq
+    elif isinstance(adapter, SequenceAdapter):
+        s = adapter.seq
+        while isinstance(s, Sequence):
+            if s.is_empty():
+                return
+            yield s.first()
+            s = s.rest()
+        if isinstance(s, (list, Vector, Range)):
+            yield from s
+    else:
+        i = 0
+        while True:
+            try:
+                value = adapter.head(i)
+            except IndexError:
+                return
+            yield value
+            i += 1
 
 
-from genia.patterns import bind_list_pattern
+from genia.patterns import bind_list_pattern, compile_parameters, constructor_key, length_key, pattern_test, rest_parameter
+from genia.hosted import sequences
 
 
 def op_add(*args):
@@ -170,6 +229,27 @@ def op_div(*args):
     return result
 
 
+_foreign_targets = {}  # "module.func" -> the Python callable it names
+
+
+def resolve_foreign(target):
+    """
+    Import and return the Python callable named by a ``foreign
+    "module.func"`` body.  Each target is resolved once and cached.
+    """
+    func = _foreign_targets.get(target)
+    if func is None:
+        module_name, _, func_name = target.rpartition('.')
+        try:
+            func = getattr(importlib.import_module(module_name), func_name)
+        except (ImportError, AttributeError, ValueError) as e:
+            raise RuntimeError(f"Cannot load foreign function '{target}': {e}") from e
+        if not callable(func):
+            raise ValueError(f"Target '{target}' is not callable.")
+        _foreign_targets[target] = func
+    return func
+
+
 class TailCall:
     """
     Represents a tail call to be optimized via TCO.
@@ -180,210 +260,256 @@ class TailCall:
         self.node_context = node_context
 
 
+class Clause:
+    """
+    A function definition compiled for dispatch.
+
+    ``match(args)`` tests the arguments against the parameter patterns and
+    returns the bound local environment, or None if they do not match.
+    ``checked`` is the parameter position a :class:`ClauseIndex` has
+    already tested, which ``match`` then skips.  ``run_guard`` and
+    ``run_body`` are the guard and body compiled by ``compile`` (usually
+    :meth:`Interpreter.compile`); they evaluate in the current environment.
+    ``hosted`` foreign clauses receive GENIA values without conversion.
+    """
+    __slots__ = ('definition', 'match', 'guard', 'body', 'foreign', 'hosted', 'run_guard', 'run_body')
+
+    def __init__(self, definition, checked=None, compile=None):
+        self.definition = definition
+        self.match = compile_parameters(definition['parameters'], checked, definition.get('locals'))
+        self.guard = definition['guard']
+        self.foreign = definition.get('foreign', False)
+        body = definition['body']
+        self.body = resolve_foreign(body) if self.foreign and isinstance(body, str) else body
+        self.hosted = definition.get('hosted', False)
+        self.run_guard = compile(self.guard) if compile and self.guard else None
+        self.run_body = compile(self.body) if compile and not self.foreign else None
+
+    def call_foreign(self, args):
+        """
+        Call a foreign clause's Python callable with ``args``.
+        """
+        if not self.hosted:
+            args = [materialize(arg) for arg in args]
+        return self.body(*args)
+
+
+class ClauseIndex:
+    """
+    Clauses of one arity arranged as a decision on one parameter position.
+
+    Each clause whose pattern at ``position`` makes a test of ``kind`` (see
+    :func:`genia.patterns.pattern_test`) is filed under the keys it accepts:
+    literal values, constructor names or list lengths.  ``candidates(args)``
+    computes the argument's key once and returns, in definition order, the
+    clauses filed under it together with the ``default`` clauses that make
+    no such test.  The filed clauses skip the test they were indexed on, so
+    that argument is tested once however many clauses share its shape.
+    Clause order is preserved, so indexing never changes which clause wins.
+    """
+    __slots__ = ('position', 'kind', 'limit', 'by_key', 'default')
+
+    def __init__(self, definitions, position, kind, compile=None):
+        self.position = position
+        self.kind = kind
+        keyed = []
+        default = []
+        for order, definition in enumerate(definitions):
+            test = pattern_test(definition['parameters'][position])
+            if test is not None and test[0] == kind:
+                keyed.append((order, test[1], Clause(definition, position, compile)))
+            else:
+                default.append((order, Clause(definition, compile=compile)))
+
+        if kind == 'length':
+            # Lengths are counted up to the longest pattern plus one
+            self.limit = max(n + 1 if exact else n for _, (n, exact), _ in keyed)
+            keys = range(self.limit + 1)
+
+            def accepts(test, length):
+                n, exact = test
+                return length == n if exact else length >= n
+        else:
+            self.limit = None
+            keys = {test for _, test, _ in keyed}
+            accepts = operator.eq
+
+        self.by_key = {}
+        for key in keys:
+            entries = [(order, clause) for order, test, clause in keyed if accepts(test, key)]
+            self.by_key[key] = [clause for _, clause in sorted(entries + default, key=lambda e: e[0])]
+        self.default = [clause for _, clause in default]
+
+    def candidates(self, args):
+        arg = args[self.position]
+        if self.kind == 'value':
+            try:
+                return self.by_key.get(arg, self.default)
+            except TypeError:  # unhashable argument, cannot equal a literal
+                return self.default
+        if self.kind == 'constructor':
+            return self.by_key.get(constructor_key(arg), self.default)
+        return self.by_key.get(length_key(arg, self.limit), self.default)
+
+    @classmethod
+    def build(cls, definitions, compile=None):
+        """
+        Compile the definitions of one arity.  Returns a ClauseIndex on the
+        position and test kind shared by the most clauses, or a plain Clause
+        list when no two clauses make the same kind of test anywhere.
+        """
+        best = None
+        if len(definitions) >= 2:
+            for position in range(len(definitions[0]['parameters'])):
+                counts = {}
+                for definition in definitions:
+                    test = pattern_test(definition['parameters'][position])
+                    if test is not None:
+                        counts[test[0]] = counts.get(test[0], 0) + 1
+                for kind, count in counts.items():
+                    if count >= 2 and (best is None or count > best[0]):
+                        best = (count, position, kind)
+        if best is None:
+            return [Clause(definition, compile=compile) for definition in definitions]
+        return cls(definitions, best[1], best[2], compile)
+
+
 class CallableFunction:
-    def __init__(self, name, closure_context=None):
+    def __init__(self, name, frame=None):
         self.name = name
         self.definitions = []
-        self.closure_context = closure_context or {}  # Captured variables
+        self.frame = frame  # Frame of the enclosing function, for closures
+        self._dispatch = None  # arity -> [Clause], built on first call
+        self._compiled_for = None  # interpreter whose engine compiled _dispatch
+        self._variadic = None  # id(definition) -> Clause for definitions with a rest parameter
 
     def add_definition(self, definition):
         if 'guard' not in definition:
             definition['guard'] = None
+        if not definition.get('hosted'):
+            # A user definition replaces built-in clauses of the same arity
+            arity = len(definition['parameters'])
+            self.definitions = [d for d in self.definitions
+                                if not (d.get('hosted') and len(d['parameters']) == arity)]
         self.definitions.append(definition)
+        self._dispatch = None
         return self
 
-    def matches(self, definition, args, interpreter):
-        if len(definition['parameters']) != len(args):
-            return False
-        for param, arg in zip(definition['parameters'], args):
-            if not self.match_parameter(param, arg):
-                return False
-        if definition['guard']:
-            # Bind parameters and push a new environment
-            bound_env = self.bind_parameters(definition, args)
-            combined_env = {**self.closure_context, **bound_env}
-            interpreter.push_env(combined_env)
-            try:
-                guard_result = interpreter.evaluate(definition['guard'])
-                if not guard_result:
-                    return False
-            finally:
-                interpreter.pop_env()
-        return True
-    
-    
-    
-    def match_parameter(self, param, arg):
-        match param.get('type'):
-            case 'list_pattern':
-                return self.match_list_pattern(param, arg)
-            case 'constructor_pattern':
-                return self.match_constructor_pattern(param, arg)
-            case 'identifier':
-                return True  # Identifiers always match
-            case 'string':
-                return param['value'] == arg
-            case 'string_literal':
-                return param['value'] == arg
-            case 'number':
-                return int(param['value']) == arg
-            case 'number_literal':
-                return int(param['value']) == arg
-            case 'wildcard':
-                return True  # Wildcards match any value
-            case _:
-                raise ValueError(f"Unsupported parameter type: {param['type']}")
-
-    def match_list_pattern(self, pattern, arg):
-        try:
-            lst = as_list_protocol(arg).to_list()
-        except TypeError:
-            return False
-        elements = pattern['elements']
-        if len(elements) == 0:
-            return len(lst) == 0
-
-        # Special case: [..pre, mid, ..post]
-        if (
-            len(elements) == 3
-            and _is_spread(elements[0])
-            and _is_spread(elements[2])
-        ):
-            mid = elements[1]
-            return any(self.match_parameter(mid, v) for v in lst)
-
-        spread_indices = [i for i, e in enumerate(elements) if _is_spread(e)]
-        if len(spread_indices) == 0:
-            if len(lst) != len(elements):
-                return False
-            return all(self.match_parameter(p, v) for p, v in zip(elements, lst))
-        if len(spread_indices) == 1 and spread_indices[0] == len(elements) - 1:
-            if len(lst) < len(elements) - 1:
-                return False
-            for p, v in zip(elements[:-1], lst[: len(elements) - 1]):
-                if not self.match_parameter(p, v):
-                    return False
-            return True
-        if len(spread_indices) == 1:
-            idx = spread_indices[0]
-            prefix = elements[:idx]
-            suffix = elements[idx + 1 :]
-            if len(lst) < len(prefix) + len(suffix):
-                return False
-            for p, v in zip(prefix, lst[: len(prefix)]):
-                if not self.match_parameter(p, v):
-                    return False
-            for p, v in zip(suffix, lst[-len(suffix) :]):
-                if not self.match_parameter(p, v):
-                    return False
-            return True
-
-        return False
-
-    def match_constructor_pattern(self, pattern, arg):
-        if not isinstance(arg, dict):
-            return False
-        if arg.get('ctor') != pattern['name']:
-            return False
-        values = arg.get('values', [])
-        if len(values) != len(pattern['parameters']):
-            return False
-        for subp, val in zip(pattern['parameters'], values):
-            if not self.match_parameter(subp, val):
-                return False
-        return True
-
-    def bind_constructor_pattern(self, pattern, arg, local_env):
-        if not isinstance(arg, dict) or arg.get('ctor') != pattern['name']:
-            raise RuntimeError(f"Constructor mismatch: expected {pattern['name']}")
-        values = arg.get('values', [])
-        if len(values) != len(pattern['parameters']):
-            raise RuntimeError(f"{pattern['name']} expects {len(pattern['parameters'])} arguments")
-        for subp, val in zip(pattern['parameters'], values):
-            match subp.get('type'):
-                case 'identifier':
-                    local_env[subp['value']] = val
-                case 'wildcard':
-                    pass
-                case 'list_pattern':
-                    bind_list_pattern(subp, val, local_env)
-                case 'constructor_pattern':
-                    self.bind_constructor_pattern(subp, val, local_env)
-                case 'string_literal':
-                    if subp['value'] != val:
-                        raise RuntimeError("Pattern mismatch")
-                case 'number_literal':
-                    if int(subp['value']) != val:
-                        raise RuntimeError("Pattern mismatch")
-                case _:
-                    pass
-
-    def bind_parameters(self, definition, args):
-        local_env = {}
-        for param, arg in zip(definition['parameters'], args):
-            match param.get('type'):
-                case 'list_pattern':
-                    bind_list_pattern(param, arg, local_env)
-                case 'constructor_pattern':
-                    self.bind_constructor_pattern(param, arg, local_env)
-                case 'identifier':
-                    local_env[param['value']] = arg
-                case 'wildcard':
-                    pass  # Wildcards do not bind to any variable
-                case 'string':
-                    pass  # Strings are literals; no binding needed
-                case 'number':
-                    pass  # Numbers are literals; no binding needed
-                case 'string_literal':
-                    pass  # Strings are literals; no binding needed
-                case 'number_literal':
-                    pass  # Numbers are literals; no binding needed
-                case _:
-                    raise ValueError(f"Unsupported parameter type: {param['type']}")
-        return local_env
+    def dispatch_table(self, interpreter=None):
+        """
+        Compile the definitions into a table keyed by arity.  Each entry is
+        the clause list in definition order, or a ClauseIndex when several
+        clauses of that arity test the same parameter.  Guards and bodies
+        are compiled with ``interpreter.compile`` when one is given.
+
+        A clause with a rest parameter accepts every argument count from its
+        number of fixed parameters up.  It is compiled once and shared by
+        the entries of those counts, which ``clauses_for`` adds as calls
+        need them.
+        """
+        if self._dispatch is None or self._compiled_for is not interpreter:
+            compile = interpreter.compile if interpreter is not None else None
+            arities = set()
+            self._variadic = {}
+            for definition in self.definitions:
+                if rest_parameter(definition['parameters']) is None:
+                    arities.add(len(definition['parameters']))
+                else:
+                    self._variadic[id(definition)] = Clause(definition, compile=compile)
+            self._compiled_for = interpreter
+            self._dispatch = {arity: self.build_clauses(arity) for arity in sorted(arities)}
+        return self._dispatch
 
-    
+    def build_clauses(self, count):
+        """
+        Return the dispatch entry for calls with ``count`` arguments.
+        """
+        compile = self._compiled_for.compile if self._compiled_for is not None else None
+        variadic = self._variadic
+        definitions = []
+        for definition in self.definitions:
+            arity = len(definition['parameters'])
+            if arity == count if id(definition) not in variadic else arity - 1 <= count:
+                definitions.append(definition)
+        if not any(id(definition) in variadic for definition in definitions):
+            return ClauseIndex.build(definitions, compile)
+        return [variadic.get(id(definition)) or Clause(definition, compile=compile) for definition in definitions]
+
+    def clauses_for(self, count):
+        """
+        Return the dispatch entry for ``count`` arguments from the built
+        table, adding it when rest parameters accept that count.
+        """
+        clauses = self._dispatch.get(count)
+        if clauses is None:
+            if not self._variadic:
+                return ()
+            clauses = self._dispatch[count] = self.build_clauses(count)
+        return clauses
+
+    def bind(self, frame):
+        """
+        Return a closure over ``frame`` that shares this function's
+        definitions and compiled dispatch table.
+        """
+        closure = copy.copy(self)
+        closure.frame = frame
+        return closure
 
     def __repr__(self):
         import json
         return f"CallableFunction('{self.name}', {self.definitions})"
 
-    def __call__(self, interpreter, args, node_context):
-        matching_function = None
-        local_env = {}
-
-        for definition in self.definitions:
-            if self.matches(definition, args, interpreter):
-                local_env = self.bind_parameters(definition, args)
-                matching_function = definition
-                break
-
-        if not matching_function:
-            raise RuntimeError(f"No matching function for '{self.name}' with arguments {args} at {node_context}")
+    def select(self, interpreter, args, node_context):
+        """
+        Return the first clause that accepts ``args``, with the frame its
+        parameters are bound in.  Guards run in that frame.
+        """
+        if self._dispatch is not None and self._compiled_for is interpreter:
+            table = self._dispatch
+        else:
+            table = self.dispatch_table(interpreter)
+        clauses = table.get(len(args))
+        if clauses is None:
+            clauses = self.clauses_for(len(args))
+        if type(clauses) is ClauseIndex:
+            clauses = clauses.candidates(args)
+        for clause in clauses:
+            frame = clause.match(args)
+            if frame is None:
+                continue
+            if clause.run_guard is None:
+                return clause, frame
+            caller = interpreter.frame
+            if not clause.foreign:
+                frame[0] = self.frame
+                interpreter.frame = frame
+            try:
+                if clause.run_guard():
+                    return clause, frame
+            finally:
+                interpreter.frame = caller
+        raise RuntimeError(f"No matching function for '{self.name}' with arguments {args} at {node_context}")
 
-        # Merge closure context with local environment
-        combined_env = {**self.closure_context, **local_env}
-        interpreter.push_env(combined_env)
+    def __call__(self, interpreter, args, node_context):
+        caller = interpreter.frame
+        while True:
+            clause, frame = self.select(interpreter, args, node_context)
+            if clause.foreign:
+                return clause.call_foreign(args)
 
-        try:
-            body = matching_function['body']
-            if matching_function.get("foreign", False):
-                # Foreign function: directly call the Python callable
-                if callable(body):
-                    result = body(*args)
-                else:
-                    module_name, func_name = body.rsplit('.', 1)
-                    module = importlib.import_module(module_name)
-                    body_fn = getattr(module, func_name)
-                    if not callable(body_fn):
-                        raise ValueError(f"Target '{body}' is not callable.")
-                    result = body_fn(*args)
-            else:
-                # Native function: evaluate the AST body
-                result = interpreter.evaluate(body)
+            # Native function: run the compiled body in the clause's frame
+            frame[0] = self.frame
+            interpreter.frame = frame
+            try:
+                result = clause.run_body()
+            finally:
+                interpreter.frame = caller
+            if type(result) is TailCall and result.func is self:
+                # Self tail call: loop with the new arguments
+                args, node_context = result.args, result.node_context
+                continue
             return result
-        finally:
-            interpreter.pop_env()
 
     def append(self, ast_node):
         """
@@ -425,12 +551,38 @@ class Delay:
         return self._value
 
 class Interpreter:
-    def __init__(self):
+    ENGINES = ('tree', 'vm', 'closure')
+
+    def __init__(self, engine=None, optimize=None):
+        """
+        Parameters:
+        - engine (str): 'tree' walks the AST directly, 'vm' compiles it to
+          bytecode (see genia.vm) and 'closure' compiles it to nested Python
+          closures (see genia.closures).  Defaults to $GENIA_ENGINE or 'tree'.
+        - optimize (bool): Fold constant expressions before running (see
+          genia.optimizer).  Defaults to true unless $GENIA_OPTIMIZE is '0'.
+        """
         self.env_stack = [dict()]  # Stack of environments for variable scopes
+        self.frame = None           # Frame of the running function clause (see genia.resolver)
         self.functions = {}         # Stores function definitions
+        self.templates = {}         # id(anonymous function node) -> (node, compiled CallableFunction)
         self.call_stack = deque()   # For TCO
         self.data_types = {}
 
+        self.engine = engine or os.environ.get('GENIA_ENGINE') or 'tree'
+        self.optimize = optimize if optimize is not None else os.environ.get('GENIA_OPTIMIZE') != '0'
+        if self.engine not in self.ENGINES:
+            raise ValueError(f"Unknown engine '{self.engine}', expected one of {', '.join(self.ENGINES)}")
+        if self.engine == 'vm':
+            from genia.vm import VM
+            self.vm = VM(self)
+            self.evaluate = self.vm.evaluate
+        self.closures = None
+        if self.engine == 'closure':
+            from genia.closures import ClosureCompiler
+            self.closures = ClosureCompiler(self)
+            self.evaluate = self.closures.evaluate
+
         self.stdin = None
         self.stdout = None
         self.stderr = None
@@ -450,20 +602,34 @@ class Interpreter:
             raise RuntimeError("Cannot pop the global environment.")
         self.env_stack.pop()
 
-    def evaluate_in_env(self, expr, env):
-        self.push_env(env.copy())
+    def evaluate_in_frame(self, expr, frame):
+        saved = self.frame
+        self.frame = frame
         try:
             return self.evaluate(expr)
         finally:
-            self.pop_env()
+            self.frame = saved
             
+    def frame_environments(self):
+        """
+        Return the locals of the running clause and of the clauses it is
+        nested in as dicts, outermost first.
+        """
+        envs = []
+        frame = self.frame
+        while frame is not None:
+            envs.append(dict(zip(frame[-1], frame[1:-1])))
+            frame = frame[0]
+        return envs[::-1]
+
     def printenv(self, name=None):
+        envs = self.env_stack + self.frame_environments()
         if name:
-            values = [{name: env[name]} for env in self.env_stack + [self.functions] if name in env]
+            values = [{name: env[name]} for env in envs + [self.functions] if name in env]
             rtnval =  values if values else f"{name} not found"
             self.write_to_stderr(str(rtnval))
         else:
-            self.write_to_stderr(str(self.env_stack))
+            self.write_to_stderr(str(envs))
 
     def add_hosted_functions(self):
         # Register foreign functions with varying arities
@@ -474,14 +640,13 @@ class Interpreter:
         self.register_foreign_function("randrange", randrange, parameters=["start", "stop"])
         self.register_foreign_function("randrange", randrange, parameters=["start", "stop", "step"])
 
-        for i in range(1, 8):
-            params = [f"msg{j}" for j in range(1, i + 1)]
-            self.register_foreign_function("print", self.write_to_stdout, parameters=params)
+        self.register_foreign_function("print", self.write_to_stdout, parameters=["msg"], rest="msgs")
         self.register_foreign_function("printenv", self.printenv)
         self.register_foreign_function("printenv", self.printenv, parameters=["name"])
         self.register_foreign_function("trace", self.do_trace)
+        sequences.register(self)
 
-        # Register operator functions for variable argument support
+        # Register operator functions, taking any number of arguments
         op_funcs = {
             '+': op_add,
             '*': op_mul,
@@ -489,28 +654,36 @@ class Interpreter:
             '/': op_div,
         }
         for name, func in op_funcs.items():
-            for i in range(0, 20):
-                params = [f"a{j}" for j in range(1, i + 1)]
-                self.register_foreign_function(name, func, parameters=params)
+            self.register_foreign_function(name, func, rest="args")
 
-    def register_foreign_function(self, name, function, parameters=None, guard=None, line=0, column=0):
+    def register_foreign_function(self, name, function, parameters=None, guard=None, line=0, column=0, hosted=False, rest=None):
         """
         Register a foreign function using the same structure as native functions
         but with a 'foreign: True' flag.
+
+        ``hosted`` marks a built-in written against GENIA values: its
+        arguments are passed unconverted, and a user definition of the same
+        name and arity replaces it.
+
+        ``rest`` names a rest parameter: the function then also accepts any
+        number of arguments after ``parameters``, all passed positionally.
         """
         if name in self.functions:
             func = self.functions[name]
         else:
-            func = CallableFunction(name, closure_context=self.create_closure_context())
+            func = CallableFunction(name)
             self.functions[name] = func
 
         func.add_definition({
-            "parameters": [{"type": "identifier", "value": param} for param in (parameters or [])],
+            "parameters": [{"type": "identifier", "value": param} for param in (parameters or [])]
+                          + ([{"type": "unary_operator", "operator": "..",
+                               "operand": {"type": "identifier", "value": rest}}] if rest else []),
             "guard": guard,
             "body": function,  # Directly store the callable function
             "line": line,
             "column": column,
             "foreign": True,  # Flag indicating this is a foreign function
+            "hosted": hosted,
         })
 
     def do_trace(self):
@@ -584,6 +757,14 @@ class Interpreter:
         self.stdout = stdout or sys.stdout
         self.stderr = stderr or sys.stderr
 
+        # Give function locals frame slots and report undefined names before running
+        resolver = Resolver(known=[*self.environment, *self.functions])
+        resolver.resolve(ast)
+        for message in resolver.undefined:
+            self.write_to_stderr(f"Warning: {message}")
+        if self.optimize:
+            Optimizer(self).optimize(ast)
+
         result = None
         if awk_mode:
             result = self.execute_awk_mode(ast, stdin=self.stdin, split_mode=awk_mode)
@@ -605,7 +786,7 @@ class Interpreter:
             if statement['type'] == "function_definition":
                 self.evaluate(statement)
             else:
-                body.append(statement)
+                body.append(self.compile(statement))
 
         begin_func = self.functions.get("begin")
         if begin_func:
@@ -616,7 +797,7 @@ class Interpreter:
             self.update_awk_variables(line.strip(), line_number, split_mode)
             if body:
                 for statement in body:
-                    result = self.evaluate(statement)
+                    result = statement()
             else:
                 body_func = self.functions.get("body")
                 if body_func:
@@ -645,6 +826,20 @@ class Interpreter:
 
         return result
 
+    def compile(self, node):
+        """
+        Return a zero-argument callable that evaluates ``node`` in the
+        current environment with this interpreter's engine.  Callers that
+        evaluate a node repeatedly, such as function clauses and the AWK
+        body, keep the callable instead of calling ``evaluate`` each time.
+        """
+        if self.engine == 'vm':
+            return self.vm.compile(node)
+        if self.engine == 'closure':
+            return self.closures.compile(node)
+        evaluate = self.evaluate
+        return lambda: evaluate(node)
+
     def evaluate(self, node):
         """
         Evaluate an AST node.
@@ -669,6 +864,12 @@ class Interpreter:
         """
         return node['value']
     
+    def eval_constant(self, node):
+        """
+        Evaluate a constant folded by genia.optimizer.
+        """
+        return node['value']
+
     def eval_number(self, node):
         """
         Evaluate a number node.
@@ -691,6 +892,16 @@ class Interpreter:
         """
         Evaluate an identifier node.
         """
+        address = node.get('address')
+        if address is not None:
+            depth, slot = address
+            frame = self.frame
+            for _ in range(depth):
+                frame = frame[0]
+            value = frame[slot]
+            while isinstance(value, Delay):
+                value = value.value(self)
+            return value
         name = node['value']
         if name in self.environment:
             value = self.environment[name]
@@ -707,13 +918,20 @@ class Interpreter:
         """
         Evaluate an assignment node.
         """
-        pattern = node['pattern']
-        pattern_type = pattern['type']
         value = self.evaluate(node['value'])
-        if pattern_type == 'list_pattern':
-            bind_list_pattern(pattern, value, self.environment)
+        return self.assign(node['pattern'], value)
+
+    def assign(self, pattern, value):
+        """
+        Bind ``value`` to ``pattern`` in the current function's frame, or
+        in the global environment at the top level.
+        """
+        env = self.environment if self.frame is None else self.frame
+        if pattern['type'] == 'list_pattern':
+            bind_list_pattern(pattern, value, env)
         else:
-            self.environment[pattern['value']] = value
+            slot = pattern.get('slot')
+            env[pattern['value'] if slot is None else slot] = value
         if genia.trace:
             self.write_to_stderr(f"TRACE: {pattern} = {value}")
         return value
@@ -742,10 +960,15 @@ class Interpreter:
     def eval_unary_operator(self, node):
         """
         Evaluate a unary operator node.
-        Currently supports the '-' operator for negation.
         """
-        operator = node['operator']
         operand = self.evaluate(node['operand'])
+        return self.unary_operation(node['operator'], operand, node)
+
+    def unary_operation(self, operator, operand, node):
+        """
+        Apply a unary operator to an evaluated operand.
+        Supports '-' and '+' on integers and '..' (spread) on lists.
+        """
         if operator == '-':
             if isinstance(operand, int):
                 return -operand
@@ -758,7 +981,7 @@ class Interpreter:
             else:
                 raise RuntimeError(f"Unary '-' operator can only be applied to integers at line {node.get('line')}, column {node.get('column')}")
         elif operator == '..':
-            if isinstance(operand, list):
+            if isinstance(operand, (list, Vector, Range)):
                 return operand
             else:
                 raise RuntimeError(f"Unary '..' operator can only be applied to list at line {node.get('line')}, column {node.get('column')}")
@@ -773,38 +996,43 @@ class Interpreter:
         if op in ('+', '-', '*', '/', '..'):
             right = self.evaluate(node['right'])
             left = self.evaluate(node['left'])
-
-            if op == '+':
-                return left + right
-            elif op == '-':
-                return left - right
-            elif op == '*':
-                return left * right
-            elif op == '/':
-                return left // right  # Integer division
-            elif op == '..':
-                if isinstance(left, int) or isinstance(right, int):
-                    if left <= right:
-                        return list(range(left, right + 1))
-                    else:
-                        return list(range(left, right - 1, -1))
-                if isinstance(left, (list, range)) and isinstance(right, (list, range)):
-                    return list(left) + list(right)
-                else:
-                    raise RuntimeError(f"`..` operator can only be used between lists or ranges at line {node.get('line')}, column {node.get('column')}")
         elif op == '~':
             left = self.evaluate(node['left'])
             right = self.evaluate(node['right'])
+        elif op == '=':
+            # Assignment is handled separately; '=' should not appear here
+            raise RuntimeError("Unexpected '=' operator in eval_operator")
+        else:
+            raise RuntimeError(f"Unsupported operator: {op} at line {node.get('line')}, column {node.get('column')}")
+        return self.binary_operation(op, left, right, node)
+
+    def binary_operation(self, op, left, right, node):
+        """
+        Apply an arithmetic, range or regex operator to evaluated operands.
+        """
+        if op == '+':
+            return left + right
+        elif op == '-':
+            return left - right
+        elif op == '*':
+            return left * right
+        elif op == '/':
+            return left // right  # Integer division
+        elif op == '..':
+            if isinstance(left, int) or isinstance(right, int):
+                return Range(left, right)
+            if isinstance(left, (list, Vector, Range)) and isinstance(right, (list, Vector, Range)):
+                return list_literal([left, right], (True, True))
+            else:
+                raise RuntimeError(f"`..` operator can only be used between lists or ranges at line {node.get('line')}, column {node.get('column')}")
+        elif op == '~':
             if not isinstance(left, str):
                 raise RuntimeError(f"Left operand of '~' must be a string at line {node.get('line')}, column {node.get('column')}")
             if not isinstance(right, str):
                 raise RuntimeError(f"Right operand of '~' must be a string (regex pattern) at line {node.get('line')}, column {node.get('column')}")
-            
+
             result = re.match(right, left)
             return bool(result)
-        elif op == '=':
-            # Assignment is handled separately; '=' should not appear here
-            raise RuntimeError("Unexpected '=' operator in eval_operator")
         else:
             raise RuntimeError(f"Unsupported operator: {op} at line {node.get('line')}, column {node.get('column')}")
 
@@ -814,8 +1042,12 @@ class Interpreter:
         """
         left = self.evaluate(node["left"])
         right = self.evaluate(node["right"])
-        operator = node["operator"]
+        return self.comparison(node["operator"], left, right, node)
 
+    def comparison(self, operator, left, right, node):
+        """
+        Apply a comparison operator to evaluated operands.
+        """
         if operator == ">":
             rtnval = left > right
         elif operator == "<":
@@ -849,38 +1081,48 @@ class Interpreter:
         end = self.evaluate(node['end'])
         if not isinstance(start, int) or not isinstance(end, int):
             raise RuntimeError("Range boundaries must be integers")
-        if start <= end:
-            return list(range(start, end + 1))
-        else:
-            return list(range(start, end - 1, -1))
+        return Range(start, end)
 
     def eval_list(self, node):
         """
         Evaluate a list expression.
         """
-        rtnval = []
-        for element in node["elements"]:
-            el = self.evaluate(element)
-            if element['type'] == 'unary_operator' and element['operator'] == '..':
-                rtnval += el
-            else:
-                rtnval.append(el)
-        return rtnval
+        elements = node["elements"]
+        values = [self.evaluate(element) for element in elements]
+        spreads = [element['type'] == 'unary_operator' and element['operator'] == '..' for element in elements]
+        return list_literal(values, spreads)
 
     def eval_function_definition(self, node):
         """
         Store function definitions with support for multiple arities.
         """
+        # Report foreign targets that cannot be imported now, not on first call
+        for definition in node['definitions']:
+            if definition.get('foreign') and isinstance(definition['body'], str):
+                resolve_foreign(definition['body'])
+
         # Named functions
         if node.get("name"):
             name = node['name']
-            func = self.functions.get(name, CallableFunction(name, closure_context=self.create_closure_context()))
-            self.functions[name] = func
+            func = self.functions.get(name)
+            if func is None:
+                func = CallableFunction(name, frame=self.capture_frame(node))
+                self.functions[name] = func
+            elif self.frame is not None:
+                func.frame = self.capture_frame(node)
         else:
-            # Anonymous functions (if needed)
-            name = f"anon_{id(node)}"
-            func = CallableFunction(name, closure_context=self.create_closure_context())
-            self.functions[name] = func
+            # Anonymous functions share clauses compiled once per node
+            entry = self.templates.get(id(node))
+            if entry is None:
+                template = CallableFunction(f"anon_{id(node)}")
+                for definition in node['definitions']:
+                    template.add_definition(definition)
+                template.dispatch_table(self)
+                entry = self.templates[id(node)] = (node, template)
+            func = entry[1].bind(self.capture_frame(node))
+            if genia.trace:
+                self.write_to_stderr(f"TRACE: Function '{func.name}' defined with definitions: {func.definitions}")
+            return func
 
         for definition in node['definitions']:
             func.add_definition(definition)
@@ -893,13 +1135,7 @@ class Interpreter:
         """
         Evaluate a function call node.
         """
-        name = node['name']
-        if name in self.functions:
-            func = self.functions[name]
-        elif name in self.environment and callable(self.environment[name]):
-            func = self.environment[name]
-        else:
-            raise RuntimeError(f"Undefined function: '{name}' at line {node.get('line')}, column {node.get('column')}")
+        func = self.resolve_function(node)
         args = [self.evaluate(arg) for arg in node['arguments']]
         if node.get('is_tail_call', False):
             # Return a TailCall instance to enable TCO
@@ -908,6 +1144,20 @@ class Interpreter:
             # Normal function call
             return self.call_function(func, args, node_context=(node.get('line'), node.get('column')))
 
+    def resolve_function(self, node):
+        """
+        Find the function named by a function call node.
+        """
+        name = node['name']
+        if name in self.functions:
+            return self.functions[name]
+        elif node.get('address') is not None:
+            return self.eval_identifier(node)
+        elif name in self.environment and callable(self.environment[name]):
+            return self.environment[name]
+        else:
+            raise RuntimeError(f"Undefined function: '{name}' at line {node.get('line')}, column {node.get('column')}")
+
     def call_function(self, func, args, node_context):
         """
         Calls a function with the given arguments, implementing TCO.
@@ -926,6 +1176,29 @@ class Interpreter:
             else:
                 raise RuntimeError(f"Cannot call non-function '{func}' at {node_context}")
 
+    def callback(self, func, arity):
+        """
+        Return a Python callable that calls the GENIA function ``func`` with
+        ``arity`` arguments, for hosted functions that take callbacks.  A
+        function whose only clause of that arity is a foreign Python
+        callable without a guard (such as ``+``) is called directly.
+        """
+        if isinstance(func, CallableFunction):
+            func.dispatch_table(self)
+            clauses = func.clauses_for(arity)
+            if type(clauses) is list and len(clauses) == 1:
+                clause = clauses[0]
+                if clause.foreign and clause.run_guard is None:
+                    if clause.hosted:
+                        return clause.body
+                    body = clause.body
+                    return lambda *args: body(*map(materialize, args))
+            call_function = self.call_function
+            return lambda *args: call_function(func, list(args), None)
+        if callable(func):
+            return func
+        raise RuntimeError(f"Cannot call non-function '{func}'")
+
     def eval_delay_expression(self, node):
         """
         Evaluate a delay expression (alias for eval_delay).
@@ -938,8 +1211,12 @@ class Interpreter:
         """
         expression = node['expression']
         if isinstance(expression, dict):
-            captured_env = self.environment.copy()
-            return Delay(lambda: self.evaluate_in_env(expression, captured_env))
+            frame = self.capture_frame(node)
+            names = node.get('locals')
+            if names is not None:
+                # Resolved inside a function: the delay runs in its own frame
+                return Delay(lambda: self.evaluate_in_frame(expression, [frame, *[None] * len(names), names]))
+            return Delay(lambda: self.evaluate_in_frame(expression, frame))
         else:
             return Delay(expression)
 
@@ -959,19 +1236,61 @@ class Interpreter:
         """
         return self.evaluate(node['expression'])
 
-    def create_closure_context(self):
+    def capture_frame(self, node):
         """
-        Create a closure context by copying the current environment, excluding special variables.
+        Return the frame a closure or delay created from ``node`` keeps:
+        the values its free variables (``node['captures']``, see
+        genia.resolver) have now, so later assignments in the running
+        clause are not seen.  Returns None when it uses no locals, and a
+        copy of the whole running frame for a node that was not resolved.
         """
-        keys_to_exclude = {"NF", "NR", "$0", "$ARGS", "$NF"}
-        return {k: v for k, v in self.environment.items() if k not in keys_to_exclude}
+        sources = node.get('captures')
+        frame = self.frame
+        if sources is None:
+            return None if frame is None else frame.copy()
+        if not sources:
+            return None
+        parent = frame[0]
+        captured = [None]
+        captured.extend([frame[slot] if depth == 0 else parent[slot] for depth, slot in sources])
+        captured.append(node['captured'])
+        return captured
 
 
 class GENIAInterpreter:
-    def __init__(self):
+    def __init__(self, cache=None, engine=None, optimize=None):
+        """
+        Parameters:
+        - cache (ASTCache): Optional cache consulted before lexing and parsing.
+        - engine (str): Execution engine, 'tree', 'vm' or 'closure'.
+        - optimize (bool): Fold constant expressions before running.
+        """
         self.lexer = None
         self.parser = None
-        self.interpreter = Interpreter()
+        self.cache = cache
+        self.interpreter = Interpreter(engine=engine, optimize=optimize)
+
+    def parse(self, code):
+        """
+        Lex and parse ``code`` into an AST, using the cache when available.
+        """
+        if self.cache is not None:
+            ast = self.cache.load(code)
+            if ast is not None:
+                return ast
+        self.lexer = Lexer(code)
+        try:
+            tokens = list(self.lexer.tokenize())
+        except Lexer.SyntaxError as e:
+            raise RuntimeError(str(e))
+        self.parser = Parser(tokens)
+        try:
+            ast = self.parser.parse()
+        except Parser.SyntaxError as e:
+            raise RuntimeError(str(e))
+        if self.cache is not None:
+            self.cache.store(code, ast)
+        return ast
 
     def run(self, code, args=None, awk_mode=None, stdin=None, stdout=None, stderr=None):
         """
@@ -988,17 +1307,7 @@ class GENIAInterpreter:
         Returns:
         - The result of the last expression executed or the result of END in AWK mode.
         """
-        self.lexer = Lexer(code)
-        try:
-            tokens = list(self.lexer.tokenize())
-        except Lexer.SyntaxError as e:
-            raise RuntimeError(str(e))
-        # print(tokens)
-        self.parser = Parser(tokens)
-        try:
-            ast = self.parser.parse()
-        except Parser.SyntaxError as e:
-            raise RuntimeError(str(e))
+        ast = self.parse(code)
         return self.interpreter.execute(ast, args=args, awk_mode=awk_mode, stdin=stdin, stdout=stdout, stderr=stderr)
 
 
@@ -1,7 +1,8 @@
 import sys
 import argparse
 
-from genia.interpreter import GENIAInterpreter
+from genia.ast_cache import ASTCache, default_cache_dir
+from genia.interpreter import GENIAInterpreter, Interpreter
 
 
 def main():
@@ -13,6 +14,24 @@ def main():
         const="whitespace",  # Default value if --awk is specified without a value
         help="Enable AWK-like processing mode with optional split mode (e.g., 'csv')",
     )
+    parser.add_argument(
+        "--cache-dir",
+        default=None,
+        help="Directory for cached parse trees (default: $GENIA_CACHE_DIR or ~/.cache/genia)",
+    )
+    parser.add_argument("--no-cache", action="store_true", help="Always re-parse the script")
+    parser.add_argument(
+        "--engine",
+        choices=Interpreter.ENGINES,
+        default=None,
+        help="Execution engine: 'tree' walks the AST, 'vm' runs compiled bytecode, "
+             "'closure' runs bodies compiled to Python closures (default: $GENIA_ENGINE or tree)",
+    )
+    parser.add_argument(
+        "--no-optimize",
+        action="store_true",
+        help="Run the script as parsed, without constant folding (also $GENIA_OPTIMIZE=0)",
+    )
     parser.add_argument("args", nargs=argparse.REMAINDER, help="Additional arguments for the script")
 
     args = parser.parse_args()
@@ -28,11 +47,10 @@ def main():
         print(f"Error: File '{script_path}' not found.")
         sys.exit(1)
 
-    # Extract arguments excluding script path and flags
-    script_args = [arg for arg in sys.argv[2:] if arg != '--awk']
+    cache = None if args.no_cache else ASTCache(args.cache_dir or default_cache_dir())
 
     # Run the interpreter
-    interpreter = GENIAInterpreter()
+    interpreter = GENIAInterpreter(cache=cache, engine=args.engine, optimize=False if args.no_optimize else None)
     try:
         interpreter.run(code, args=script_args, awk_mode=awk_mode)
     except Exception as e:
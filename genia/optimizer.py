@@ -0,0 +1,170 @@
+# genia/optimizer.py
+
+"""
+Constant folding for GENIA programs.
+
+The optimizer runs once over a program after it has been resolved (see
+:mod:`genia.resolver`) and before it is executed.  It replaces expressions
+whose value is the same on every evaluation with ``constant`` nodes that
+hold the value itself:
+
+- number literals, converted from their source text once;
+- string literals;
+- arithmetic, ``..`` and comparisons whose operands are constant, and
+  unary ``-`` and ``+`` of a constant;
+- list literals whose elements (and spread operands) are constant.
+
+GENIA lists and ranges are immutable, so the one value a folded list or
+range holds is shared by every evaluation.  Foreign functions receive a
+copy (see :func:`genia.vector.materialize`).  An operation that fails at
+load time, such as ``1 / 0``, is left in place so it raises when, and only
+if, it is evaluated.  Regex matches (``~``), patterns and foreign bodies
+are left alone.
+
+Set ``GENIA_OPTIMIZE=0`` or pass ``--no-optimize`` to run programs as
+parsed, for example to see every node in a ``trace()``.
+"""
+
+import operator
+
+from genia.vector import list_literal
+
+COMPARISONS = {
+    '==': operator.eq,
+    '!=': operator.ne,
+    '<': operator.lt,
+    '>': operator.gt,
+    '<=': operator.le,
+    '>=': operator.ge,
+}
+
+
+def is_constant(node):
+    return isinstance(node, dict) and node.get('type') == 'constant'
+
+
+def is_spread(node):
+    return node.get('type') == 'unary_operator' and node.get('operator') == '..'
+
+
+class Optimizer:
+    """
+    Fold the constant expressions of a program in place (see module docs).
+    ``interpreter`` supplies the operators, so folded values are exactly
+    what evaluating the expression would produce.
+    """
+
+    def __init__(self, interpreter):
+        self.interpreter = interpreter
+        self.folded = 0  # expressions replaced by constants
+
+    def optimize(self, statements):
+        for i, statement in enumerate(statements):
+            statements[i] = self.fold(statement)
+        return statements
+
+    def fold(self, node):
+        """
+        Return ``node`` with its constant subexpressions folded; the node
+        itself may be replaced.
+        """
+        if not isinstance(node, dict):
+            return node
+        method = getattr(self, f"fold_{node.get('type')}", None)
+        if method is None:
+            return node
+        return method(node)
+
+    def constant(self, node, value):
+        self.folded += 1
+        return {'type': 'constant', 'value': value, 'line': node.get('line'), 'column': node.get('column')}
+
+    def fold_number(self, node):
+        return self.constant(node, int(node['value']))
+
+    def fold_string(self, node):
+        return self.constant(node, node['value'])
+
+    fold_raw_string = fold_string
+
+    def fold_expression_statement(self, node):
+        node['expression'] = self.fold(node['expression'])
+        return node
+
+    def fold_grouped_statements(self, node):
+        node['statements'] = [self.fold(statement) for statement in node['statements']]
+        return node
+
+    def fold_assignment(self, node):
+        node['value'] = self.fold(node['value'])
+        return node
+
+    def fold_function_definition(self, node):
+        for definition in node['definitions']:
+            if definition.get('foreign'):
+                continue
+            definition['guard'] = self.fold(definition.get('guard'))
+            definition['body'] = self.fold(definition['body'])
+        return node
+
+    def fold_function_call(self, node):
+        node['arguments'] = [self.fold(argument) for argument in node['arguments']]
+        return node
+
+    def fold_delay(self, node):
+        node['expression'] = self.fold(node['expression'])
+        return node
+
+    fold_delay_expression = fold_delay
+
+    def fold_operator(self, node):
+        node['left'] = self.fold(node['left'])
+        node['right'] = self.fold(node['right'])
+        op = node['operator']
+        if op == '~' or not (is_constant(node['left']) and is_constant(node['right'])):
+            return node
+        try:
+            value = self.interpreter.binary_operation(op, node['left']['value'], node['right']['value'], node)
+        except Exception:
+            return node
+        return self.constant(node, value)
+
+    def fold_comparator(self, node):
+        node['left'] = self.fold(node['left'])
+        node['right'] = self.fold(node['right'])
+        compare = COMPARISONS.get(node['operator'])
+        if compare is None or not (is_constant(node['left']) and is_constant(node['right'])):
+            return node
+        try:
+            value = compare(node['left']['value'], node['right']['value'])
+        except Exception:
+            return node
+        return self.constant(node, value)
+
+    def fold_unary_operator(self, node):
+        node['operand'] = self.fold(node['operand'])
+        # A spread stays in place so the enclosing list literal sees it
+        if is_spread(node) or not is_constant(node['operand']):
+            return node
+        try:
+            value = self.interpreter.unary_operation(node['operator'], node['operand']['value'], node)
+        except Exception:
+            return node
+        return self.constant(node, value)
+
+    def fold_list(self, node):
+        elements = node['elements'] = [self.fold(element) for element in node['elements']]
+        values = []
+        spreads = []
+        for element in elements:
+            spread = is_spread(element)
+            value_node = element['operand'] if spread else element
+            if not is_constant(value_node):
+                return node
+            values.append(value_node['value'])
+            spreads.append(spread)
+        try:
+            value = list_literal(values, spreads)
+        except Exception:
+            return node
+        return self.constant(node, value)
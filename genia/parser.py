@@ -47,22 +47,10 @@ class Parser:
         if token_type == 'KEYWORD' and value == 'define':
             return self.define_statement()
         elif token_type in {'IDENTIFIER', 'PUNCTUATION'}:
-            # Attempt to parse a pattern
-            tokens_copy = deque(self.tokens)
-            try:
-                pattern = self.parse_pattern()
-                if self.tokens and self.tokens[0][0] == 'OPERATOR' and self.tokens[0][1] == '=':
-                    return self.assignment(pattern=pattern)
-                else:
-                    self.tokens = tokens_copy
-                    return self.expression_statement()
-            except self.SyntaxError:
-                self.tokens = tokens_copy
-                return self.expression_statement()
-        elif token_type == 'IDENTIFIER':
-            # Lookahead to check if it's an assignment
-            if len(self.tokens) > 1 and self.tokens[1][0] == 'OPERATOR' and self.tokens[1][1] == '=':
-                return self.assignment()
+            # Look ahead past a pattern for '=' without consuming tokens
+            end = self.pattern_end(0)
+            if end is not None and end < len(self.tokens) and self.tokens[end][0] == 'OPERATOR' and self.tokens[end][1] == '=':
+                return self.assignment(pattern=self.parse_pattern())
             else:
                 return self.expression_statement()
         else:
@@ -119,8 +107,7 @@ class Parser:
                 self.tokens.popleft()  # Consume ')'
                 break
             else:
-                pattern = self.parse_pattern()
-                parameters.append(pattern)
+                self.parse_parameter(parameters)
                 # After a pattern, expect either ',' or ')'
                 if self.tokens and self.tokens[0][0] == 'PUNCTUATION' and self.tokens[0][1] == ',':
                     self.tokens.popleft()  # Consume ','
@@ -143,7 +130,7 @@ class Parser:
             raise self.SyntaxError(f"Expected '->' after function guard at line {line}, column {column}")
 
         # Parse body
-        body = self.expression(is_tail=True)
+        body = self.expression()
 
         definitions = [{
             'parameters': parameters,
@@ -174,8 +161,7 @@ class Parser:
                         self.tokens.popleft()  # Consume ')'
                         break
                     else:
-                        pattern = self.parse_pattern()
-                        parameters.append(pattern)
+                        self.parse_parameter(parameters)
                         # After a pattern, expect either ',' or ')'
                         if self.tokens and self.tokens[0][0] == 'PUNCTUATION' and self.tokens[0][1] == ',':
                             self.tokens.popleft()  # Consume ','
@@ -198,7 +184,7 @@ class Parser:
                     raise self.SyntaxError(f"Expected '->' after alternative parameters at line {line}, column {column}")
 
                 # Parse body
-                body = self.expression(is_tail=True)
+                body = self.expression()
 
                 definitions.append({
                     'parameters': parameters,
@@ -209,6 +195,10 @@ class Parser:
             else:
                 break
 
+        for definition in definitions:
+            if not definition['foreign']:
+                self.annotate_tail_calls(definition['body'])
+
         return {
             'type': 'function_definition',
             'name': func_name,
@@ -279,6 +269,31 @@ class Parser:
         }
   
 
+    def parse_parameter(self, parameters):
+        """
+        Parse one function parameter and append it to ``parameters``.
+        ``..name`` is a rest parameter: it binds the remaining arguments as a
+        list and must be the last parameter.
+        """
+        if parameters and parameters[-1]['type'] == 'unary_operator':
+            rest = parameters[-1]
+            raise self.SyntaxError(f"Rest parameter '..{rest['operand']['value']}' must be the last parameter at line {rest['line']}, column {rest['column']}")
+        token = self.tokens[0]
+        if token.type != 'OPERATOR' or token.value != '..':
+            parameters.append(self.parse_pattern())
+            return
+        self.tokens.popleft()  # Consume '..'
+        if not self.tokens or self.tokens[0].type != 'IDENTIFIER':
+            raise self.SyntaxError(f"Expected identifier after '..' in parameter list at line {token.line}, column {token.column}")
+        name = self.tokens.popleft()
+        parameters.append({
+            'type': 'unary_operator',
+            'operator': '..',
+            'operand': {'type': 'identifier', 'value': name.value, 'line': name.line, 'column': name.column},
+            'line': token.line,
+            'column': token.column
+        })
+
     def parse_pattern(self):
         """
         Parses a pattern in the parameter list.
@@ -373,6 +388,68 @@ class Parser:
         else:
             raise self.SyntaxError(f"Unexpected token {token_type} '{value}' in parameter pattern at line {line}, column {column}")
 
+    def pattern_end(self, index):
+        """
+        Scan the pattern starting at ``self.tokens[index]`` without consuming it.
+        Returns the index just past the pattern, or None if the tokens do not
+        form a pattern that parse_pattern would accept.
+        Only looks at the tokens of the pattern itself, so deciding between an
+        assignment and an expression costs time proportional to the pattern.
+        """
+        tokens = self.tokens
+        if index >= len(tokens):
+            return None
+        token_type, value = tokens[index][0], tokens[index][1]
+
+        if token_type == 'PUNCTUATION' and value == '[':
+            index += 1
+            while index < len(tokens):
+                token_type, value = tokens[index][0], tokens[index][1]
+                if token_type == 'PUNCTUATION' and value == ']':
+                    return index + 1
+                elif token_type == 'PUNCTUATION' and value == ',':
+                    index += 1
+                elif token_type == 'OPERATOR' and value == '..':
+                    if index + 1 >= len(tokens) or tokens[index + 1][0] != 'IDENTIFIER':
+                        return None
+                    index += 2
+                elif token_type in {'NUMBER', 'STRING', 'RAW_STRING'}:
+                    index += 1
+                else:
+                    index = self.pattern_end(index)
+                    if index is None:
+                        return None
+            return None
+
+        elif token_type == 'PUNCTUATION' and value == '(':
+            index = self.pattern_end(index + 1)
+            if index is None or index >= len(tokens) or tokens[index][0] != 'PUNCTUATION' or tokens[index][1] != ')':
+                return None
+            return index + 1
+
+        elif token_type in {'NUMBER', 'STRING', 'RAW_STRING'}:
+            return index + 1
+
+        elif token_type == 'IDENTIFIER':
+            index += 1
+            if index < len(tokens) and tokens[index][0] == 'PUNCTUATION' and tokens[index][1] == '(':
+                # Constructor pattern
+                index += 1
+                while index < len(tokens):
+                    if tokens[index][0] == 'PUNCTUATION' and tokens[index][1] == ')':
+                        return index + 1
+                    index = self.pattern_end(index)
+                    if index is None or index >= len(tokens):
+                        return None
+                    if tokens[index][0] == 'PUNCTUATION' and tokens[index][1] == ',':
+                        index += 1
+                    elif not (tokens[index][0] == 'PUNCTUATION' and tokens[index][1] == ')'):
+                        return None
+                return None
+            return index
+
+        return None
+
     def parse_grouped_pattern(self):
         """
         Parses a grouped pattern enclosed in parentheses.
@@ -416,7 +493,7 @@ class Parser:
         else:
             raise self.SyntaxError(f"Unsupported literal type {token_type} in pattern at line {line}, column {column}")
 
-    def assignment(self, pattern=None, is_tail=False):
+    def assignment(self, pattern=None):
         if not self.tokens:
             raise self.SyntaxError("Unexpected end of input in assignment")
         if pattern is None:
@@ -444,7 +521,7 @@ class Parser:
                 f"Expected '=' in assignment at line {line}, column {column}")
 
         # Parse the expression on the right-hand side
-        value = self.expression(is_tail=is_tail)
+        value = self.expression()
 
         return {
             'type': 'assignment',
@@ -461,7 +538,7 @@ class Parser:
             'expression': expr
         }
 
-    def expression(self, precedence=0, is_tail=False):
+    def expression(self, precedence=0):
         """
         Pratt parser implementation for expressions.
         """
@@ -469,7 +546,7 @@ class Parser:
             raise self.SyntaxError("Unexpected end of input in expression")
 
         token_type, value, line, column = self.tokens.popleft()
-        left = self.nud(token_type, value, line, column, is_tail)
+        left = self.nud(token_type, value, line, column)
 
         while self.tokens:
             next_token_type, next_value, next_line, next_column = self.tokens[0]
@@ -485,17 +562,26 @@ class Parser:
                 
             if op_precedence < precedence:
                 break
-        if is_tail:
-            self.annotate_tail_calls(left)
         return left
     
     def annotate_tail_calls(self, node):
         """
-        Annotate the node as a tail call if it is a function call.
-        Does not traverse child nodes.
+        Mark the function calls in tail position of a function body as tail
+        calls: the body itself, or the last statement of a grouped body,
+        through any number of nested groups.  Calls in other positions,
+        such as arguments, operands and assigned values, are not marked.
         """
-        if isinstance(node, dict) and node.get('type') == 'function_call':
-            node['is_tail_call'] = True
+        while isinstance(node, dict):
+            kind = node.get('type')
+            if kind == 'function_call':
+                node['is_tail_call'] = True
+                return
+            if kind == 'grouped_statements' and node['statements']:
+                node = node['statements'][-1]
+            elif kind == 'expression_statement':
+                node = node['expression']
+            else:
+                return
 
                         
     def get_precedence_name(self, token_type, value):
@@ -526,7 +612,7 @@ class Parser:
         else:
             return 'UNKNOWN'
 
-    def nud(self, token_type, value, line, column, is_tail=False):
+    def nud(self, token_type, value, line, column):
         """
         Null denotation for tokens that start expressions.
         """
@@ -641,11 +727,8 @@ class Parser:
                     self.tokens.popleft()  # Consume ')'
                     break
                 else:
-                    # Determine if this statement is in a tail position
-                    # Only the last statement in the group is in tail position
-                    is_last = False
                     # Parse a statement within the group
-                    statement = self.group_statement(is_tail=is_tail and is_last)
+                    statement = self.group_statement()
                     statements.append(statement)
                     # After a statement, expect ';' or ')'
                     if self.tokens and self.tokens[0][0] == 'PUNCTUATION' and self.tokens[0][1] == ';':
@@ -671,7 +754,7 @@ class Parser:
         else:
             raise self.SyntaxError(f"Unexpected token {token_type} {value} at line {line}, column {column}")
 
-    def group_statement(self, is_tail=False):
+    def group_statement(self):
         """
         Parses a statement within a grouped context, such as inside ().
         Does not wrap expressions in 'expression_statement'.
@@ -686,12 +769,12 @@ class Parser:
         elif token_type == 'IDENTIFIER':
             # Lookahead to check if it's an assignment
             if len(self.tokens) > 1 and self.tokens[1][0] == 'OPERATOR' and self.tokens[1][1] == '=':
-                return self.assignment(is_tail=is_tail)
+                return self.assignment()
             else:
-                expr = self.expression(is_tail=is_tail)
+                expr = self.expression()
                 return expr
         else:
-            expr = self.expression(is_tail=is_tail)
+            expr = self.expression()
             return expr
 
     def led(self, token_type, value, left, precedence, line, column):
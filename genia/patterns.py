@@ -1,6 +1,10 @@
 from __future__ import annotations
 
-from genia.interpreter import as_list_protocol
+from itertools import islice
+
+from genia.interpreter import as_list_protocol, iter_list_protocol, list_prefix
+from genia.ranges import Range
+from genia.vector import Vector
 
 
 def _is_spread(element: dict) -> bool:
@@ -10,10 +14,17 @@ def _is_spread(element: dict) -> bool:
     )
 
 
-def _spread_name(element: dict) -> str:
+def _binding_key(node: dict):
+    """Return where a binding pattern stores its value: the frame slot the
+    resolver gave it (see :mod:`genia.resolver`), or its name."""
+    slot = node.get("slot")
+    return node["value"] if slot is None else slot
+
+
+def _spread_name(element: dict):
     if element.get("type") == "unary_operator":
-        return element["operand"]["value"]
-    return element["value"]
+        return _binding_key(element["operand"])
+    return _binding_key(element)
 
 
 def bind_list_pattern(pattern: dict, arg, local_env: dict) -> None:
@@ -21,76 +32,346 @@ def bind_list_pattern(pattern: dict, arg, local_env: dict) -> None:
 
     Supports patterns like ``[head, ..tail]`` and ``[..pre, mid, ..post]``.
     ``arg`` is adapted using :func:`as_list_protocol` and must therefore
-    conform to :class:`genia.interpreter.ListProtocol`.
+    conform to :class:`genia.interpreter.ListProtocol`.  As in
+    ``[a, b] = seq``, elements beyond the pattern are ignored.
+    """
+    if not _compile_list_pattern(pattern, exact=False)(arg, local_env):
+        raise RuntimeError(f"Cannot bind {arg!r} to list pattern")
+
+
+# Clause parameters are tested cheapest first: literals, then constructors,
+# then list shapes.  Plain identifiers cannot fail and are bound last.
+_TEST_ORDER = {
+    "number": 0,
+    "number_literal": 0,
+    "string": 0,
+    "string_literal": 0,
+    "constructor_pattern": 1,
+    "list_pattern": 2,
+}
+
+
+def compile_pattern(pattern: dict, checked: bool = False):
+    """Compile ``pattern`` into a ``matcher(arg, env) -> bool`` function.
+
+    The matcher tests ``arg`` and binds the pattern's variables into ``env``
+    in a single pass.  ``env`` is a dict keyed by name or, for patterns
+    annotated by the resolver, a frame list indexed by slot.  It may be
+    partially updated when the match fails, so callers should discard it in
+    that case.  Returns ``None`` for
+    wildcards, which match anything without binding.
+
+    ``checked`` means the caller has already made the test described by
+    :func:`pattern_test`, so the matcher skips it.  A checked literal needs
+    no matcher at all.
     """
+    kind = pattern.get("type")
+    if kind == "wildcard":
+        return None
+    if kind == "identifier":
+        name = _binding_key(pattern)
+
+        def match_identifier(arg, env):
+            env[name] = arg
+            return True
+
+        return match_identifier
+    if kind in ("string", "string_literal", "number", "number_literal"):
+        if checked:
+            return None
+        value = pattern["value"] if kind.startswith("string") else int(pattern["value"])
+        return lambda arg, env: arg == value
+    if kind == "constructor_pattern":
+        return _compile_constructor_pattern(pattern, checked)
+    if kind == "list_pattern":
+        return _compile_list_pattern(pattern, checked=checked)
+
+    def unsupported(arg, env):
+        raise ValueError(f"Unsupported parameter type: {kind}")
+
+    return unsupported
+
+
+def pattern_test(pattern: dict):
+    """Describe the test ``pattern`` makes on its argument as ``(kind, key)``.
+
+    - ``("value", v)``: the argument equals the literal ``v``
+    - ``("constructor", (name, arity))``: see :func:`constructor_key`
+    - ``("length", (n, exact))``: a list with exactly ``n`` elements, or at
+      least ``n`` when ``exact`` is false; see :func:`length_key`
+
+    Returns ``None`` for patterns that cannot be indexed.
+    """
+    kind = pattern.get("type")
+    if kind in ("number", "number_literal"):
+        return "value", int(pattern["value"])
+    if kind in ("string", "string_literal"):
+        return "value", pattern["value"]
+    if kind == "constructor_pattern":
+        return "constructor", (pattern["name"], len(pattern["parameters"]))
+    if kind == "list_pattern":
+        elements = pattern["elements"]
+        spreads = [i for i, e in enumerate(elements) if _is_spread(e)]
+        if not spreads:
+            return "length", (len(elements), True)
+        if spreads == [len(elements) - 1]:
+            return "length", (len(elements) - 1, False)
+    return None
+
+
+def constructor_key(arg):
+    """Return ``(name, arity)`` for a constructed value, otherwise ``None``."""
+    if type(arg) is dict and "ctor" in arg:
+        return arg["ctor"], len(arg.get("values", ()))
+    return None
+
+
+def length_key(arg, limit: int):
+    """Return ``min(len(arg), limit)`` for a list-like ``arg``, reading at
+    most ``limit`` elements, or ``None`` if ``arg`` is not list-like."""
+    if type(arg) is list or type(arg) is Vector or type(arg) is Range:
+        return min(len(arg), limit)
+    try:
+        adapter = as_list_protocol(arg)
+    except TypeError:
+        return None
+    return sum(1 for _ in islice(iter_list_protocol(adapter), limit))
+
+
+def _compile_constructor_pattern(pattern: dict, checked: bool = False):
+    ctor = pattern["name"]
+    arity = len(pattern["parameters"])
+    fields = [(i, m) for i, m in enumerate(map(compile_pattern, pattern["parameters"])) if m is not None]
+
+    if checked:
+        def match_fields(arg, env):
+            values = arg["values"]
+            for i, matcher in fields:
+                if not matcher(values[i], env):
+                    return False
+            return True
+
+        return match_fields
+
+    def match_constructor(arg, env):
+        if not isinstance(arg, dict) or arg.get("ctor") != ctor:
+            return False
+        values = arg.get("values", [])
+        if len(values) != arity:
+            return False
+        for i, matcher in fields:
+            if not matcher(values[i], env):
+                return False
+        return True
+
+    return match_constructor
+
+
+def _compile_list_pattern(pattern: dict, exact: bool = True, checked: bool = False):
     elements = pattern["elements"]
-    if len(elements) == 0:
-        return
-
-    adapter = as_list_protocol(arg)
-
-    # Handle pattern of form [..pre, mid, ..post]
-    if (
-        len(elements) == 3
-        and _is_spread(elements[0])
-        and _is_spread(elements[2])
-    ):
-        lst = adapter.to_list()
-        pre_name = _spread_name(elements[0])
-        post_name = _spread_name(elements[2])
-        mid_pat = elements[1]
-        from genia.interpreter import CallableFunction
-
-        cf = CallableFunction("_bind_helper")
-        for i, val in enumerate(lst):
-            if cf.match_parameter(mid_pat, val):
-                local_env[pre_name] = lst[:i]
-                local_env[post_name] = lst[i + 1 :]
-                match mid_pat.get("type"):
-                    case "identifier":
-                        local_env[mid_pat["value"]] = val
-                    case "wildcard":
-                        pass
-                    case "list_pattern":
-                        bind_list_pattern(mid_pat, val, local_env)
-                    case "constructor_pattern":
-                        cf.bind_constructor_pattern(mid_pat, val, local_env)
-                    case "number_literal":
-                        if val != mid_pat["value"]:
-                            raise RuntimeError("Pattern mismatch")
-                    case "string_literal":
-                        if val != mid_pat["value"]:
-                            raise RuntimeError("Pattern mismatch")
-                return
-        raise RuntimeError("No matching element for pattern")
-
-    for i, element in enumerate(elements):
-        if _is_spread(element):
-            name = _spread_name(element)
-            local_env[name] = adapter.tail(i)
+    spreads = [i for i, e in enumerate(elements) if _is_spread(e)]
+
+    if spreads == [0, 2] and len(elements) == 3:
+        return _compile_search_pattern(*elements)
+    if len(spreads) == 1 and spreads[0] != len(elements) - 1:
+        return _compile_middle_spread_pattern(elements, spreads[0])
+    if len(spreads) > 1:
+        return lambda arg, env: False
+
+    rest_name = _spread_name(elements[-1]) if spreads else None
+    fixed = len(elements) - 1 if spreads else len(elements)
+    exact_length = exact and rest_name is None
+    items = [(i, m) for i, m in enumerate(map(compile_pattern, elements[:fixed])) if m is not None]
+
+    if checked:
+        # The caller has verified the length (see length_key)
+        exact_length = False
+
+    def match_list(arg, env):
+        kind = type(arg)
+        if kind is list or kind is Vector or kind is Range:
+            if not checked and (len(arg) < fixed or (exact_length and len(arg) != fixed)):
+                return False
+            values = arg
+            adapter = None if kind is list else arg
+        else:
+            # Touch only the elements the pattern needs
+            try:
+                adapter = as_list_protocol(arg)
+            except TypeError:
+                return False
+            values = list_prefix(adapter, fixed, exact=exact_length)
+            if values is None:
+                return False
+        for i, matcher in items:
+            if not matcher(values[i], env):
+                return False
+        if rest_name is not None:
+            # Lists, vectors and ranges bind the rest as a view, without copying
+            env[rest_name] = Vector(values, fixed) if adapter is None else adapter.tail(fixed)
+        return True
+
+    return match_list
+
+
+def _compile_search_pattern(pre: dict, mid: dict, post: dict):
+    """Compile ``[..pre, mid, ..post]``, which binds around the first
+    element matching ``mid``.  Elements are read one at a time and the scan
+    stops at the first match, so ``post`` stays lazy."""
+    pre_name = _spread_name(pre)
+    post_name = _spread_name(post)
+    mid_matcher = compile_pattern(mid)
+
+    def match_search(arg, env):
+        try:
+            adapter = as_list_protocol(arg)
+        except TypeError:
+            return False
+        seen = []
+        for i, value in enumerate(iter_list_protocol(adapter)):
+            # A failed test of ``mid`` may leave partial bindings; frames
+            # are discarded or fully rebound, dicts get only a clean match
+            bound = {} if type(env) is dict else env
+            if mid_matcher is None or mid_matcher(value, bound):
+                env[pre_name] = seen
+                if bound is not env:
+                    env.update(bound)
+                env[post_name] = adapter.tail(i + 1)
+                return True
+            seen.append(value)
+        return False
+
+    return match_search
+
+
+def _compile_middle_spread_pattern(elements: list, index: int):
+    """Compile ``[a, ..middle, z]``.  Matching needs the length, so values
+    that are not lists are materialised."""
+    name = _spread_name(elements[index])
+    prefix = [(i, m) for i, m in enumerate(map(compile_pattern, elements[:index])) if m is not None]
+    suffix_len = len(elements) - index - 1
+    suffix = [(i, m) for i, m in enumerate(map(compile_pattern, elements[index + 1:])) if m is not None]
+
+    def match_middle(arg, env):
+        if type(arg) is list or type(arg) is Vector or type(arg) is Range:
+            values = arg
         else:
             try:
-                v = adapter.head(i)
-            except Exception:
-                raise RuntimeError(
-                    f"Not enough elements to bind parameter '{element.get('value', '?')}'",
-                )
-            match element["type"]:
-                case "wildcard":
-                    pass
-                case "list_pattern":
-                    bind_list_pattern(element, v, local_env)
-                case "constructor_pattern":
-                    from genia.interpreter import CallableFunction
-                    CallableFunction("_bind_helper").bind_constructor_pattern(
-                        element, v, local_env
-                    )
-                case "number_literal":
-                    if v != element["value"]:
-                        raise RuntimeError("Pattern mismatch")
-                case "string_literal":
-                    if v != element["value"]:
-                        raise RuntimeError("Pattern mismatch")
-                case _:
-                    local_env[element["value"]] = v
+                values = as_list_protocol(arg).to_list()
+            except TypeError:
+                return False
+        end = len(values) - suffix_len
+        if end < index:
+            return False
+        for i, matcher in prefix:
+            if not matcher(values[i], env):
+                return False
+        for i, matcher in suffix:
+            if not matcher(values[end + i], env):
+                return False
+        env[name] = values[index:end]
+        return True
+
+    return match_middle
+
+
+def rest_parameter(parameters: list) -> dict | None:
+    """Return the trailing ``..name`` rest parameter of a clause, or None."""
+    if parameters and _is_spread(parameters[-1]):
+        return parameters[-1]
+    return None
+
+
+def compile_parameters(parameters: list, checked: int | None = None, local_names: list | None = None):
+    """Compile a clause's parameter patterns into ``match(args) -> env | None``.
+
+    ``args`` must already have the clause's arity, or at least as many
+    arguments as the fixed parameters when the last parameter is a rest
+    parameter, which binds the surplus arguments as a list.  Tests run
+    cheapest first (see ``_TEST_ORDER``) and each argument is tested and
+    bound once.  ``checked`` is the index of a parameter whose
+    :func:`pattern_test` the caller has already made.
+
+    With ``local_names`` (set by the resolver) ``env`` is a new frame: a
+    list with slot 0 left for the caller, the parameters stored at their
+    slots and ``local_names`` in the last slot.  Otherwise it is a dict
+    keyed by name.
+    """
+    rest = rest_parameter(parameters)
+    if rest is not None:
+        count = len(parameters) - 1
+        match_fixed = compile_parameters(parameters[:-1], checked, local_names)
+        key = _spread_name(rest)
+
+        def match_rest(args):
+            env = match_fixed(args[:count])
+            if env is not None:
+                env[key] = args[count:]
+            return env
+        return match_rest
+
+    def compile_at(index, param):
+        return compile_pattern(param, checked=index == checked)
+
+    names = []
+    tests = []
+    bound = []
+    for index, param in enumerate(parameters):
+        kind = param.get("type")
+        if kind == "identifier":
+            names.append((index, _binding_key(param)))
+            bound.append(_binding_key(param))
+        elif kind != "wildcard":
+            matcher = compile_at(index, param)
+            if matcher is not None:
+                tests.append((_TEST_ORDER.get(kind, 3), index, matcher))
+            bound.extend(_pattern_names(param))
+
+    if len(set(bound)) == len(bound):
+        tests.sort(key=lambda test: test[:2])
+    else:
+        # Repeated names: keep positional order so the last binding wins
+        tests = [(0, index, matcher) for index, matcher in
+                 ((index, compile_at(index, param)) for index, param in enumerate(parameters))
+                 if matcher is not None]
+        names = []
+
+    if local_names is None:
+        if not tests:
+            return lambda args: {name: args[index] for index, name in names}
+        new_env = dict
+    elif not tests and names == [(index, index + 1) for index in range(len(parameters))]:
+        # Plain parameters occupy the first slots in order
+        padding = (None,) * (len(local_names) - len(parameters)) + (tuple(local_names),)
+        return lambda args: [None, *args, *padding]
+    else:
+        empty = [None] * (len(local_names) + 1) + [tuple(local_names)]
+        new_env = empty.copy
+
+    checks = [(index, matcher) for _, index, matcher in tests]
+
+    def match(args):
+        env = new_env()
+        for index, matcher in checks:
+            if not matcher(args[index], env):
+                return None
+        for index, name in names:
+            env[name] = args[index]
+        return env
+
+    return match
+
 
+def _pattern_names(pattern: dict) -> list:
+    kind = pattern.get("type")
+    if kind == "identifier":
+        return [_binding_key(pattern)]
+    if kind == "list_pattern":
+        return [
+            name
+            for element in pattern["elements"]
+            for name in ([_spread_name(element)] if _is_spread(element) else _pattern_names(element))
+        ]
+    if kind == "constructor_pattern":
+        return [name for sub in pattern["parameters"] for name in _pattern_names(sub)]
+    return []
@@ -0,0 +1,73 @@
+# genia/ranges.py
+
+"""
+Lazy integer ranges for the ``..`` operator.
+
+``a..b`` used to build ``list(range(...))`` straight away, so ``1..10000000``
+allocated ten million integers even when a script only looked at the first
+few.  A :class:`Range` stores just its bounds: indexing, ``len`` and
+``tail`` are O(1), and elements are produced as they are iterated.  Ranges
+behave like lists inside GENIA (patterns, spreads, equality, printing) and
+are only turned into a list when handed to foreign Python code.
+"""
+
+
+class Range:
+    """
+    The inclusive integer range ``start..stop``, counting down when
+    ``start > stop``.
+
+    ``head``, ``tail`` and ``to_list`` implement
+    :class:`genia.interpreter.ListProtocol`.
+    """
+    __slots__ = ('range',)
+
+    def __init__(self, start, stop):
+        step = 1 if start <= stop else -1
+        self.range = range(start, stop + step, step)
+
+    @classmethod
+    def _wrap(cls, values):
+        result = cls.__new__(cls)
+        result.range = values
+        return result
+
+    def __len__(self):
+        return len(self.range)
+
+    def __bool__(self):
+        return len(self.range) > 0
+
+    def __iter__(self):
+        return iter(self.range)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return Range._wrap(self.range[index])
+        return self.range[index]
+
+    def __contains__(self, value):
+        return value in self.range
+
+    def __eq__(self, other):
+        if type(other) is Range:
+            return self.range == other.range
+        if isinstance(other, list) or hasattr(other, 'to_list'):
+            return len(self) == len(other) and all(a == b for a, b in zip(self.range, other))
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        return repr(list(self.range))
+
+    def head(self, index=0):
+        if index < 0:
+            raise IndexError("Range index out of range")
+        return self.range[index]
+
+    def tail(self, start=1):
+        return Range._wrap(self.range[start:])
+
+    def to_list(self):
+        return list(self.range)
@@ -0,0 +1,267 @@
+# genia/resolver.py
+
+"""
+Lexical addressing for GENIA programs.
+
+The resolver runs once over a parsed program before it is executed.  Each
+function clause gets a frame: a fixed-size list whose slot 0 holds the
+frame of the enclosing function (for closures), whose last slot holds the
+names of the locals (for ``printenv``) and whose other slots hold the
+clause's parameters and local variables.  The resolver annotates the AST in
+place:
+
+- a clause's definition gets ``locals``, the local names in slot order;
+- identifiers bound by a parameter pattern or by an assignment inside a
+  function get ``slot``, the index they are stored at;
+- identifier references to a function local get ``address``, a
+  ``(depth, slot)`` pair: depth 0 is the clause's own frame and depth 1
+  the frame of values it captured (slot 0);
+- nested function definitions and delays inside a function get
+  ``captures``, the addresses (in the enclosing clause) of the free
+  variables they use, and ``captured``, the names of those variables.
+
+A closure or delay copies only its free variables when it is created, into
+a compact frame laid out like a clause frame.  A variable used several
+function levels down is captured by every function in between, so no
+reference is more than one frame away.
+
+Names that are not local are globals: top-level variables, functions, data
+constructors and the AWK variables, looked up by name at run time.  Names
+that are neither local nor global anywhere in the program are collected in
+``Resolver.undefined`` so they can be reported when the program is loaded;
+evaluating such a reference still raises the usual error.
+
+Locals are resolved in source order, so a reference that precedes the
+first assignment of a name in the same clause refers to the outer binding,
+as it did when function environments were copied at call time.
+"""
+
+import re
+
+# Variables the interpreter sets while running a script
+SPECIAL_NAMES = {"NR", "NF", "FS", "$0", "$NF", "$ARGS"}
+FIELD_NAME = re.compile(r"\$\d+$")
+
+
+class Scope:
+    """
+    The locals of one function clause (or delay).  ``captures`` holds the
+    variables it can capture from the enclosing clause, None at the top
+    level.
+    """
+    __slots__ = ('slots', 'captures', 'closures')
+
+    def __init__(self, captures=None):
+        self.slots = {}
+        self.captures = captures
+        self.closures = {}  # function name -> Captures shared by its definitions
+
+    def declare(self, name):
+        slot = self.slots.get(name)
+        if slot is None:
+            slot = self.slots[name] = len(self.slots) + 1
+        return slot
+
+    def lookup(self, name):
+        slot = self.slots.get(name)
+        if slot is not None:
+            return 0, slot
+        if self.captures is None:
+            return None
+        slot = self.captures.lookup(name)
+        return None if slot is None else (1, slot)
+
+
+class Captures:
+    """
+    The free variables of a closure: the locals of the enclosing clause
+    (``outer``) that the closure's clauses reference.  ``sources`` holds
+    their addresses in ``outer`` and ``names`` their names, in slot order.
+    """
+    __slots__ = ('outer', 'slots', 'sources', 'names')
+
+    def __init__(self, outer):
+        self.outer = outer
+        self.slots = {}
+        self.sources = []
+        self.names = []
+
+    def lookup(self, name):
+        slot = self.slots.get(name)
+        if slot is None:
+            source = self.outer.lookup(name)
+            if source is None:
+                return None
+            slot = self.slots[name] = len(self.slots) + 1
+            self.sources.append(source)
+            self.names.append(name)
+        return slot
+
+
+class Resolver:
+    """
+    Annotate a program with frame slots and addresses (see module docs).
+
+    ``known`` names globals that exist before the program runs, such as
+    hosted functions and variables left by an earlier program.
+    """
+
+    def __init__(self, known=()):
+        self.known = set(known) | SPECIAL_NAMES
+        self.functions = set()
+        self.globals = set()
+        self.undefined = []  # messages for names that are defined nowhere
+
+    def resolve(self, statements):
+        for statement in statements:
+            self.collect(statement, top_level=True)
+        for statement in statements:
+            self.visit(statement, None)
+        return statements
+
+    def collect(self, node, top_level):
+        """
+        Record the functions, data constructors and top-level variables
+        defined anywhere in ``node``.
+        """
+        if isinstance(node, list):
+            for item in node:
+                self.collect(item, top_level)
+            return
+        if not isinstance(node, dict):
+            return
+        kind = node.get('type')
+        if kind == 'function_definition':
+            if node.get('name'):
+                self.functions.add(node['name'])
+            for definition in node['definitions']:
+                if not definition.get('foreign'):
+                    self.collect([definition['guard'], definition['body']], top_level=False)
+            return
+        if kind == 'data_definition':
+            self.globals.update(ctor['name'] for ctor in node['constructors'])
+            return
+        if kind == 'assignment' and top_level:
+            self.globals.update(pattern_names(node['pattern']))
+        for value in node.values():
+            if isinstance(value, (dict, list)):
+                self.collect(value, top_level)
+
+    def is_global(self, name):
+        return (name in self.globals or name in self.functions or name in self.known
+                or FIELD_NAME.match(name) is not None)
+
+    def visit(self, node, scope):
+        if isinstance(node, list):
+            for item in node:
+                self.visit(item, scope)
+            return
+        if not isinstance(node, dict):
+            return
+        method = getattr(self, f"visit_{node.get('type')}", None)
+        if method is not None:
+            method(node, scope)
+            return
+        for value in node.values():
+            if isinstance(value, (dict, list)):
+                self.visit(value, scope)
+
+    def visit_identifier(self, node, scope):
+        address = scope.lookup(node['value']) if scope is not None else None
+        if address is not None:
+            node['address'] = address
+            return
+        node.pop('address', None)
+        if not self.is_global(node['value']):
+            self.undefined.append(f"Undefined identifier '{node['value']}' at line {node.get('line')}, column {node.get('column')}")
+
+    def visit_function_call(self, node, scope):
+        name = node['name']
+        address = None
+        if name not in self.functions and scope is not None:
+            address = scope.lookup(name)
+        if address is not None:
+            node['address'] = address
+        else:
+            node.pop('address', None)
+            if not self.is_global(name):
+                self.undefined.append(f"Undefined function: '{name}' at line {node.get('line')}, column {node.get('column')}")
+        self.visit(node['arguments'], scope)
+
+    def visit_assignment(self, node, scope):
+        self.visit(node['value'], scope)
+        self.bind(node['pattern'], scope)
+
+    def visit_function_definition(self, node, scope):
+        captures = None
+        if scope is not None:
+            # Definitions of one named function in a clause share its captured frame
+            name = node.get('name')
+            captures = scope.closures.get(name) if name else None
+            if captures is None:
+                captures = Captures(scope)
+                if name:
+                    scope.closures[name] = captures
+        for definition in node['definitions']:
+            if definition.get('foreign'):
+                continue
+            local = Scope(captures)
+            for parameter in definition['parameters']:
+                self.bind(parameter, local)
+            self.visit(definition['guard'], local)
+            self.visit(definition['body'], local)
+            definition['locals'] = list(local.slots)
+        self.set_captures(node, captures)
+
+    def visit_delay(self, node, scope):
+        if scope is None:
+            self.visit(node['expression'], None)
+            return
+        captures = Captures(scope)
+        local = Scope(captures)
+        self.visit(node['expression'], local)
+        node['locals'] = list(local.slots)
+        self.set_captures(node, captures)
+
+    visit_delay_expression = visit_delay
+
+    def set_captures(self, node, captures):
+        if captures is None:
+            node['captures'], node['captured'] = [], []
+        else:
+            node['captures'], node['captured'] = captures.sources, captures.names
+
+    def visit_data_definition(self, node, scope):
+        pass
+
+    def bind(self, pattern, scope):
+        """
+        Give each identifier bound by ``pattern`` a slot in ``scope``, or
+        none when ``scope`` is None (a global assignment).
+        """
+        for binder in pattern_binders(pattern):
+            if scope is None:
+                binder.pop('slot', None)
+            else:
+                binder['slot'] = scope.declare(binder['value'])
+
+
+def pattern_binders(pattern):
+    """
+    Return the nodes of ``pattern`` that bind a name, in order.  Each has
+    the name under ``value``.
+    """
+    kind = pattern.get('type')
+    if kind == 'identifier' or kind == 'rest':
+        return [pattern]
+    if kind == 'unary_operator' and pattern.get('operator') == '..':
+        return pattern_binders(pattern['operand'])
+    if kind == 'list_pattern':
+        return [binder for element in pattern['elements'] for binder in pattern_binders(element)]
+    if kind == 'constructor_pattern':
+        return [binder for sub in pattern['parameters'] for binder in pattern_binders(sub)]
+    return []
+
+
+def pattern_names(pattern):
+    return [binder['value'] for binder in pattern_binders(pattern)]
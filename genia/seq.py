@@ -88,13 +88,14 @@ def delay_seq(head, tail):
     return DelaySeq(head, tail)
 
 def count_seq(max, seq):
-    if max < 1 or seq.is_empty():
-        return 0
-    return 1 + count_seq(max - 1, seq.rest())
+    count = 0
+    while count < max and not seq.is_empty():
+        count += 1
+        seq = seq.rest()
+    return count
 
 def nth_seq(n, seq):
     """Zero based"""
-    if n == 0:
-        return seq.first()
-    else:
-        return nth_seq(n - 1, seq.rest())
\ No newline at end of file
+    for _ in range(n):
+        seq = seq.rest()
+    return seq.first()
\ No newline at end of file
@@ -1,17 +1,21 @@
 import json
+import os
 from http.server import BaseHTTPRequestHandler, HTTPServer
 from pathlib import Path
 
+from genia.ast_cache import ASTCache
 from genia.interpreter import GENIAInterpreter
 
 SCRIPT_PATH = Path(__file__).resolve().parents[2] / 'scripts' / 'dice.genia'
 BASE_CODE = SCRIPT_PATH.read_text()
+# Parse dice.genia once per process (and once per cache dir, if configured)
+AST_CACHE = ASTCache(os.environ.get('GENIA_CACHE_DIR'))
 
 def dict_get(d, key, default=None):
     return d.get(key, default)
 
 def _load_interpreter():
-    interp = GENIAInterpreter()
+    interp = GENIAInterpreter(cache=AST_CACHE)
     interp.run(BASE_CODE, args=[])
     return interp
 
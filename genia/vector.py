@@ -0,0 +1,208 @@
+# genia/vector.py
+
+"""
+Persistent vectors: GENIA's list representation.
+
+A :class:`Vector` is an immutable sequence that shares storage with the
+vectors it was built from:
+
+- ``tail(n)`` (binding ``[head, ..tail]``) is an O(1) view.
+- ``[..acc, x]`` appends to the buffer behind ``acc`` in place when
+  ``acc`` ends at the end of that buffer, so building a list one element at
+  a time is amortised O(1) per element instead of a full copy.
+- ``[x, ..acc]`` does the same with a second buffer that grows towards the
+  front, which keeps ``reverse``-style accumulation O(1) per element.
+
+A vector only appends in place to a buffer it created itself (a
+:class:`Buffer`) and only when no other vector has already extended it; in
+every other case the affected buffer is copied.  Python lists wrapped by a
+vector, such as lists returned by foreign functions, are never modified.
+
+Vectors behave like lists inside GENIA: they match list patterns, can be
+spread into list literals, compare equal to lists with the same elements
+and print like lists.  Foreign Python functions receive plain lists; see
+:func:`materialize`.
+"""
+
+from itertools import chain
+
+from genia.ranges import Range
+
+
+class Buffer(list):
+    """
+    Storage owned by vectors.  Only buffers of this type are extended in
+    place.
+    """
+    __slots__ = ()
+
+
+class Vector:
+    """
+    An immutable sequence: the first ``front_len`` elements of ``front`` in
+    reverse order followed by ``data[start:end]``.
+
+    ``head``, ``tail`` and ``to_list`` implement
+    :class:`genia.interpreter.ListProtocol`.  ``Vector(data, start)`` is a
+    view of a list or vector from ``start``.
+    """
+    __slots__ = ('front', 'front_len', 'data', 'start', 'end')
+
+    def __init__(self, data=(), start=0):
+        if type(data) is Vector:
+            view = data.tail(start)
+            self.front, self.front_len = view.front, view.front_len
+            self.data, self.start, self.end = view.data, view.start, view.end
+            return
+        if not isinstance(data, list):
+            data = Buffer(data)
+        self.front = None
+        self.front_len = 0
+        self.data = data
+        self.end = len(data)
+        self.start = min(start, self.end)
+
+    @classmethod
+    def _make(cls, front, front_len, data, start, end):
+        vector = cls.__new__(cls)
+        vector.front = front
+        vector.front_len = front_len
+        vector.data = data
+        vector.start = start
+        vector.end = end
+        return vector
+
+    def __len__(self):
+        return self.front_len + self.end - self.start
+
+    def __bool__(self):
+        return self.front_len > 0 or self.end > self.start
+
+    def __iter__(self):
+        back = map(self.data.__getitem__, range(self.start, self.end))
+        if not self.front_len:
+            return back
+        return chain(map(self.front.__getitem__, range(self.front_len - 1, -1, -1)), back)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            if index.step is None and index.stop is None and (index.start or 0) >= 0:
+                return self.tail(index.start or 0)
+            return self.to_list()[index]
+        if index < 0:
+            index += len(self)
+            if index < 0:
+                raise IndexError("Vector index out of range")
+        return self.head(index)
+
+    def __contains__(self, value):
+        return any(item == value for item in self)
+
+    def __eq__(self, other):
+        if isinstance(other, (Vector, list, Range)):
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+        return NotImplemented
+
+    __hash__ = None
+
+    def __add__(self, other):
+        return self.to_list() + list(other)
+
+    def __radd__(self, other):
+        return list(other) + self.to_list()
+
+    def __repr__(self):
+        return repr(self.to_list())
+
+    def head(self, index=0):
+        if index < 0:
+            raise IndexError("Vector index out of range")
+        if index < self.front_len:
+            return self.front[self.front_len - 1 - index]
+        index += self.start - self.front_len
+        if index >= self.end:
+            raise IndexError("Vector index out of range")
+        return self.data[index]
+
+    def tail(self, start=1):
+        if start <= 0:
+            return self
+        if start <= self.front_len:
+            return Vector._make(self.front, self.front_len - start, self.data, self.start, self.end)
+        start = min(self.start + start - self.front_len, self.end)
+        return Vector._make(None, 0, self.data, start, self.end)
+
+    def to_list(self):
+        items = self.data[self.start:self.end]
+        if self.front_len:
+            items[:0] = self.front[self.front_len - 1::-1]
+        return items
+
+    def append(self, *values):
+        """
+        Return this vector followed by ``values``.
+        """
+        data = self.data
+        if type(data) is Buffer and self.end == len(data):
+            data.extend(values)
+            start = self.start
+        else:
+            data = Buffer(data[self.start:self.end])
+            data.extend(values)
+            start = 0
+        return Vector._make(self.front, self.front_len, data, start, len(data))
+
+    def prepend(self, *values):
+        """
+        Return ``values`` followed by this vector.
+        """
+        front = self.front
+        if front is None or self.front_len != len(front):
+            front = Buffer(front[:self.front_len] if front else ())
+        front.extend(reversed(values))
+        return Vector._make(front, len(front), self.data, self.start, self.end)
+
+
+def list_literal(values, spreads):
+    """
+    Build the value of a list literal from its evaluated elements.
+
+    ``spreads[i]`` is true when ``values[i]`` came from a ``..`` spread.
+    ``[..acc, x, ...]`` and ``[x, ..., ..acc]`` with a vector ``acc`` share
+    its storage; every other literal gets a new buffer.
+    """
+    if len(values) > 1:
+        if spreads[0] and type(values[0]) is Vector and not any(spreads[1:]):
+            return values[0].append(*values[1:])
+        if spreads[-1] and type(values[-1]) is Vector and not any(spreads[:-1]):
+            return values[-1].prepend(*values[:-1])
+    data = Buffer()
+    for value, spread in zip(values, spreads):
+        if spread:
+            data.extend(value)
+        else:
+            data.append(value)
+    return Vector(data)
+
+
+def materialize(value):
+    """
+    Return ``value`` with every :class:`Vector` and
+    :class:`genia.ranges.Range` inside it converted to a plain list, for
+    handing to foreign Python code.  Lists, and the ``values`` of
+    constructed data, are converted recursively.  Values that contain
+    neither are returned unchanged, so foreign functions that
+    update a list in place still see the caller's list.
+    """
+    kind = type(value)
+    if kind is Vector:
+        return [materialize(item) for item in value]
+    if kind is Range:
+        return value.to_list()
+    if kind is list:
+        items = [materialize(item) for item in value]
+        return value if all(a is b for a, b in zip(items, value)) else items
+    if kind is dict and 'ctor' in value:
+        values = materialize(value.get('values', []))
+        return value if values is value.get('values') else {**value, 'values': values}
+    return value
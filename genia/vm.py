@@ -0,0 +1,391 @@
+# genia/vm.py
+
+"""
+Bytecode compiler and stack VM for GENIA.
+
+The parser's dict-based AST is compiled once per node into a :class:`Code`
+object: a flat list of ``opcode, argument`` pairs plus a constant pool and a
+name pool.  :class:`VM` runs code objects with a single dispatch loop, so
+evaluating a function body no longer goes through ``getattr`` and an
+``eval_*`` method per node.  Function locals are read and written by frame
+slot (``LOAD_SLOT``, ``STORE_SLOT``) using the addresses assigned by
+:mod:`genia.resolver`; only globals are looked up by name.
+
+Calls from VM code to GENIA functions whose bodies the VM compiled do not
+recurse in Python: the caller's code, program counter, value stack and
+frame are pushed on a call stack kept in a list, and the callee's body runs
+in the same dispatch loop.  Tail calls replace the running body instead, so
+recursion depth is bounded by memory rather than by Python's recursion
+limit.  Guards, foreign functions and callbacks from hosted functions still
+run as nested Python calls.
+
+The VM shares the interpreter's environments, functions and value semantics
+(``binary_operation``, ``comparison``, ``assign`` ...).  Node types without
+a dedicated opcode (``delay``, ``data_definition`` ...) are compiled to
+``EVAL``, which hands the node to the tree walker.  Per-node tracing is only
+done by the tree walker.
+"""
+
+import genia
+from genia.interpreter import CallableFunction, Delay, Interpreter, TailCall
+from genia.vector import list_literal
+
+# Opcodes
+LOAD_CONST = 0      # push consts[arg]
+LOAD_NAME = 1       # push the value of the identifier names[arg]
+STORE = 2           # bind top of stack to the pattern consts[arg], leave value
+POP = 3             # discard top of stack
+ADD = 4             # left = pop(), right = pop(), push(left op right)
+SUB = 5
+MUL = 6
+DIV = 7
+BINARY_OP = 8       # left, right as above; operator node consts[arg]
+COMPARE_OP = 9      # right = pop(), left = pop(); comparator node consts[arg]
+UNARY_OP = 10       # operand = pop(); unary node consts[arg]
+BUILD_LIST = 11     # pop len(consts[arg]) values; consts[arg] holds spread flags
+LOAD_FUNCTION = 12  # push the function named by the call node consts[arg]
+CALL = 13           # consts[arg] = (argc, node_context)
+TAIL_CALL = 14      # as CALL but replaces the running body
+MAKE_FUNCTION = 15  # define the function node consts[arg], push it
+EVAL = 16           # push tree-walker result for node consts[arg]
+LOAD_SLOT = 17      # push slot arg of the running frame
+LOAD_OUTER = 18     # push the local at address consts[arg] = (depth, slot)
+STORE_SLOT = 19     # store top of stack in slot arg of the running frame, leave value
+
+OPNAMES = {value: name for name, value in globals().items() if name.isupper() and isinstance(value, int)}
+
+ARITHMETIC = {'+': ADD, '-': SUB, '*': MUL, '/': DIV}
+
+
+class Code:
+    """
+    A compiled AST node.
+    """
+    __slots__ = ('ops', 'consts', 'names', '_const_index')
+
+    def __init__(self):
+        self.ops = []
+        self.consts = []
+        self.names = []
+        self._const_index = {}
+
+    def emit(self, op, arg=0):
+        self.ops.append(op)
+        self.ops.append(arg)
+
+    def const(self, value):
+        """
+        Add ``value`` to the constant pool and return its index.
+        Constants are compared by identity so AST nodes are never merged.
+        """
+        index = self._const_index.get(id(value))
+        if index is None:
+            index = len(self.consts)
+            self.consts.append(value)
+            self._const_index[id(value)] = index
+        return index
+
+    def name(self, node):
+        """
+        Add an identifier node to the name pool and return its index.
+        The node is kept alongside the name for error reporting.
+        """
+        self.names.append((node['value'], node))
+        return len(self.names) - 1
+
+    def disassemble(self):
+        """
+        Return a readable listing, one instruction per line.
+        """
+        lines = []
+        for pc in range(0, len(self.ops), 2):
+            op, arg = self.ops[pc], self.ops[pc + 1]
+            if op == LOAD_NAME:
+                detail = self.names[arg][0]
+            elif op in (LOAD_SLOT, STORE_SLOT):
+                detail = str(arg)
+            elif op in (LOAD_CONST, LOAD_OUTER, CALL, TAIL_CALL, BUILD_LIST):
+                detail = repr(self.consts[arg])
+            elif op in (ADD, SUB, MUL, DIV, POP):
+                detail = ''
+            else:
+                detail = self.consts[arg].get('type', '')
+            lines.append(f"{pc // 2:4} {OPNAMES[op]:<14} {detail}".rstrip())
+        return "\n".join(lines)
+
+
+class Compiler:
+    """
+    Compile AST nodes into :class:`Code` objects.
+    """
+
+    def compile(self, node):
+        code = Code()
+        self.emit_node(code, node)
+        return code
+
+    def emit_node(self, code, node):
+        method = getattr(self, f"compile_{node['type']}", None)
+        if method is None:
+            code.emit(EVAL, code.const(node))
+        else:
+            method(code, node)
+
+    def compile_number(self, code, node):
+        code.emit(LOAD_CONST, code.const(int(node['value'])))
+
+    def compile_string(self, code, node):
+        code.emit(LOAD_CONST, code.const(node['value']))
+
+    compile_raw_string = compile_string
+    compile_constant = compile_string
+    compile_number_literal = compile_string
+    compile_string_literal = compile_string
+
+    def compile_identifier(self, code, node):
+        address = node.get('address')
+        if address is None:
+            code.emit(LOAD_NAME, code.name(node))
+        elif address[0] == 0:
+            code.emit(LOAD_SLOT, address[1])
+        else:
+            code.emit(LOAD_OUTER, code.const(tuple(address)))
+
+    def compile_expression_statement(self, code, node):
+        self.emit_node(code, node['expression'])
+
+    def compile_grouped_statements(self, code, node):
+        statements = node['statements']
+        if not statements:
+            code.emit(LOAD_CONST, code.const(None))
+        for i, statement in enumerate(statements):
+            self.emit_node(code, statement)
+            if i < len(statements) - 1:
+                code.emit(POP)
+
+    def compile_assignment(self, code, node):
+        self.emit_node(code, node['value'])
+        pattern = node['pattern']
+        if pattern['type'] == 'identifier' and pattern.get('slot') is not None:
+            code.emit(STORE_SLOT, pattern['slot'])
+        else:
+            code.emit(STORE, code.const(pattern))
+
+    def compile_operator(self, code, node):
+        op = node['operator']
+        if op in ('+', '-', '*', '/', '..'):
+            # Right operand first, matching the tree walker
+            self.emit_node(code, node['right'])
+            self.emit_node(code, node['left'])
+            code.emit(ARITHMETIC.get(op, BINARY_OP), code.const(node))
+        elif op == '~':
+            self.emit_node(code, node['left'])
+            self.emit_node(code, node['right'])
+            code.emit(COMPARE_OP, code.const(node))
+        else:
+            code.emit(EVAL, code.const(node))
+
+    def compile_comparator(self, code, node):
+        self.emit_node(code, node['left'])
+        self.emit_node(code, node['right'])
+        code.emit(COMPARE_OP, code.const(node))
+
+    def compile_unary_operator(self, code, node):
+        self.emit_node(code, node['operand'])
+        code.emit(UNARY_OP, code.const(node))
+
+    def compile_list(self, code, node):
+        spreads = []
+        for element in node['elements']:
+            self.emit_node(code, element)
+            spreads.append(element['type'] == 'unary_operator' and element['operator'] == '..')
+        code.emit(BUILD_LIST, code.const(tuple(spreads)))
+
+    def compile_function_call(self, code, node):
+        code.emit(LOAD_FUNCTION, code.const(node))
+        for argument in node['arguments']:
+            self.emit_node(code, argument)
+        call = (len(node['arguments']), (node.get('line'), node.get('column')))
+        code.emit(TAIL_CALL if node.get('is_tail_call', False) else CALL, code.const(call))
+
+    def compile_function_definition(self, code, node):
+        code.emit(MAKE_FUNCTION, code.const(node))
+
+
+class VM:
+    """
+    Runs compiled GENIA code against an :class:`Interpreter`'s state.
+
+    ``evaluate`` is a drop-in replacement for ``Interpreter.evaluate``.
+    ``compile`` returns a callable bound to one code object; function
+    clauses keep it so their bodies run without recompiling.
+    """
+
+    def __init__(self, interpreter):
+        self.interpreter = interpreter
+        self.compiler = Compiler()
+
+    def compile(self, node):
+        code = self.compiler.compile(node)
+        run = self.run
+
+        def run_code():
+            return run(code)
+        run_code.code = code  # lets CALL run the body without recursing
+        return run_code
+
+    def evaluate(self, node):
+        return self.run(self.compiler.compile(node))
+
+    def run(self, code):
+        interp = self.interpreter
+        env_stack = interp.env_stack
+        functions = interp.functions
+        # The running frame only changes when a call or return switches code
+        entry = frame = interp.frame
+        calls = []  # suspended callers: (code, pc, stack, frame)
+        ops = code.ops
+        consts = code.consts
+        names = code.names
+        stack = []
+        push = stack.append
+        pop = stack.pop
+        pc = 0
+        end = len(ops)
+
+        try:
+            while True:
+                if pc >= end:
+                    result = stack[-1] if stack else None
+                    if not calls:
+                        return result
+                    # Return to the caller
+                    code, pc, stack, frame = calls.pop()
+                    ops = code.ops
+                    consts = code.consts
+                    names = code.names
+                    push = stack.append
+                    pop = stack.pop
+                    end = len(ops)
+                    interp.frame = frame
+                    push(result)
+                    continue
+
+                op = ops[pc]
+                arg = ops[pc + 1]
+                pc += 2
+
+                if op == LOAD_SLOT:
+                    value = frame[arg]
+                    while isinstance(value, Delay):
+                        value = value.value(interp)
+                    push(value)
+                elif op == LOAD_NAME:
+                    name, node = names[arg]
+                    env = env_stack[-1]
+                    if name in env:
+                        value = env[name]
+                    elif name in functions:
+                        value = functions[name]
+                    else:
+                        value = interp.eval_identifier(node)
+                    while isinstance(value, Delay):
+                        value = value.value(interp)
+                    push(value)
+                elif op == LOAD_CONST:
+                    push(consts[arg])
+                elif op == LOAD_FUNCTION:
+                    push(interp.resolve_function(consts[arg]))
+                elif op == CALL or op == TAIL_CALL:
+                    argc, node_context = consts[arg]
+                    if argc:
+                        args = stack[-argc:]
+                        del stack[-argc:]
+                    else:
+                        args = []
+                    func = pop()
+                    if type(func) is not CallableFunction:
+                        push(interp.call_function(func, args, node_context))
+                        continue
+                    clause, callee = func.select(interp, args, node_context)
+                    if clause.foreign:
+                        push(clause.call_foreign(args))
+                        continue
+                    body = getattr(clause.run_body, 'code', None)
+                    if body is None:
+                        push(interp.call_function(func, args, node_context))
+                        continue
+                    # Run the callee's body here; a tail call drops the running body
+                    if op == CALL:
+                        calls.append((code, pc, stack, frame))
+                    callee[0] = func.frame
+                    frame = interp.frame = callee
+                    code = body
+                    ops = code.ops
+                    consts = code.consts
+                    names = code.names
+                    stack = []
+                    push = stack.append
+                    pop = stack.pop
+                    pc = 0
+                    end = len(ops)
+                elif op == ADD:
+                    left = pop()
+                    push(left + pop())
+                elif op == SUB:
+                    left = pop()
+                    push(left - pop())
+                elif op == MUL:
+                    left = pop()
+                    push(left * pop())
+                elif op == DIV:
+                    left = pop()
+                    push(left // pop())
+                elif op == COMPARE_OP:
+                    right = pop()
+                    left = pop()
+                    node = consts[arg]
+                    if node['type'] == 'operator':
+                        push(interp.binary_operation(node['operator'], left, right, node))
+                    else:
+                        push(interp.comparison(node['operator'], left, right, node))
+                elif op == BUILD_LIST:
+                    spreads = consts[arg]
+                    count = len(spreads)
+                    values = stack[len(stack) - count:]
+                    del stack[len(stack) - count:]
+                    push(list_literal(values, spreads))
+                elif op == STORE:
+                    value = pop()
+                    push(interp.assign(consts[arg], value))
+                elif op == STORE_SLOT:
+                    frame[arg] = stack[-1]
+                    if genia.trace:
+                        interp.write_to_stderr(f"TRACE: {frame[-1][arg - 1]} = {stack[-1]}")
+                elif op == LOAD_OUTER:
+                    depth, slot = consts[arg]
+                    outer = frame
+                    for _ in range(depth):
+                        outer = outer[0]
+                    value = outer[slot]
+                    while isinstance(value, Delay):
+                        value = value.value(interp)
+                    push(value)
+                elif op == POP:
+                    pop()
+                elif op == BINARY_OP:
+                    left = pop()
+                    right = pop()
+                    node = consts[arg]
+                    push(interp.binary_operation(node['operator'], left, right, node))
+                elif op == UNARY_OP:
+                    node = consts[arg]
+                    push(interp.unary_operation(node['operator'], pop(), node))
+                elif op == MAKE_FUNCTION:
+                    push(interp.eval_function_definition(consts[arg]))
+                elif op == EVAL:
+                    push(Interpreter.evaluate(interp, consts[arg]))
+                else:
+                    raise RuntimeError(f"Unknown opcode {op}")
+        finally:
+            interp.frame = entry
@@ -0,0 +1,74 @@
+import os
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from genia.ast_cache import ASTCache
+from genia.interpreter import GENIAInterpreter
+from genia.lexer import Lexer
+
+CODE = """
+define add(a, b) -> a + b
+add(2, 3)
+"""
+
+
+def test_store_and_load_round_trip(tmp_path):
+    cache = ASTCache(tmp_path)
+    assert cache.load(CODE) is None
+    ast = GENIAInterpreter().parse(CODE)
+    cache.store(CODE, ast)
+    assert ASTCache(tmp_path).load(CODE) == ast
+
+
+def test_load_returns_fresh_copy():
+    cache = ASTCache()
+    cache.store(CODE, GENIAInterpreter().parse(CODE))
+    first = cache.load(CODE)
+    first[0]['name'] = 'changed'
+    assert cache.load(CODE)[0]['name'] == 'add'
+
+
+def test_cached_run_skips_lexer(tmp_path, monkeypatch):
+    assert GENIAInterpreter(cache=ASTCache(tmp_path)).run(CODE) == 5
+
+    def fail(self):
+        raise AssertionError("script was re-lexed")
+
+    monkeypatch.setattr(Lexer, "tokenize", fail)
+    assert GENIAInterpreter(cache=ASTCache(tmp_path)).run(CODE) == 5
+
+
+def test_changed_source_misses(tmp_path):
+    cache = ASTCache(tmp_path)
+    GENIAInterpreter(cache=cache).run(CODE)
+    assert cache.load(CODE.replace("2, 3", "3, 4")) is None
+
+
+def test_corrupt_entry_is_a_miss(tmp_path):
+    cache = ASTCache(tmp_path)
+    GENIAInterpreter(cache=cache).run(CODE)
+    cache.path_for(cache.key(CODE)).write_bytes(b"not marshal data")
+    assert ASTCache(tmp_path).load(CODE) is None
+    assert GENIAInterpreter(cache=ASTCache(tmp_path)).run(CODE) == 5
+
+
+def test_store_evicts_least_recently_used(tmp_path):
+    cache = ASTCache(tmp_path, max_entries=2)
+    sources = [f"{n} + 1" for n in range(3)]
+    for i, code in enumerate(sources[:2]):
+        cache.store(code, GENIAInterpreter().parse(code))
+        os.utime(cache.path_for(cache.key(code)), (i, i))
+    assert ASTCache(tmp_path).load(sources[0]) is not None  # refreshes entry 0
+    cache.store(sources[2], GENIAInterpreter().parse(sources[2]))
+    assert len(cache.entries()) == 2
+    assert ASTCache(tmp_path).load(sources[1]) is None
+
+
+def test_clear_removes_disk_entries(tmp_path):
+    cache = ASTCache(tmp_path)
+    GENIAInterpreter(cache=cache).run(CODE)
+    cache.clear()
+    assert cache.entries() == []
+    assert cache.load(CODE) is None
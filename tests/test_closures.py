@@ -0,0 +1,49 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from genia.interpreter import GENIAInterpreter, Interpreter
+
+SEQ_PATH = Path(__file__).resolve().parent.parent / 'scripts' / 'seq.genia'
+SEQ_FUNCTIONS = SEQ_PATH.read_text().split('define inc')[0]
+
+
+def run(code, engine):
+    return GENIAInterpreter(engine=engine).run(code)
+
+
+def test_clauses_keep_compiled_guard_and_body():
+    interp = GENIAInterpreter(engine='closure')
+    interp.run("define f(x) when x > 0 -> x * 2 | (_) -> 0\nf(1)")
+    func = interp.interpreter.functions['f']
+    clauses = func.dispatch_table(interp.interpreter)[1]
+    assert all(callable(clause.run_body) for clause in clauses)
+    assert callable(clauses[0].run_guard) and clauses[1].run_guard is None
+    assert func.dispatch_table(interp.interpreter) is func.dispatch_table(interp.interpreter)
+
+
+@pytest.mark.parametrize("code", [
+    "10 - 2 - 3",
+    "[0, ..1..3, ..[4]]",
+    "[h, ..t] = [1, 2, 3]\n[t, h]",
+    "define fact(0) -> 1 | (n) -> n * fact(n - 1)\nfact(12)",
+    "define classify(n) when n < 0 -> \"neg\" | (0) -> \"zero\" | (_) -> \"pos\"\n[classify(-1), classify(0), classify(3)]",
+    "\"hello\" ~ r\"h.*o\"",
+    "d = delay(6 * 7)\nd",
+    "reduce(+, 0, map(define(x) -> x * 2, filter(define(x) -> x > 3, 1..20)))",
+    "interleve([1, 2, 3], [4, 5, 6])",
+])
+def test_closure_engine_matches_tree_walker(code):
+    assert run(SEQ_FUNCTIONS + code, 'closure') == run(SEQ_FUNCTIONS + code, 'tree')
+
+
+def test_closure_engine_reports_undefined_identifier():
+    with pytest.raises(RuntimeError, match="Undefined identifier 'missing'"):
+        run("define f() -> missing\nf()", 'closure')
+
+
+def test_closure_engine_is_registered():
+    assert 'closure' in Interpreter.ENGINES
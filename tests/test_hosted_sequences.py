@@ -0,0 +1,62 @@
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from genia.interpreter import GENIAInterpreter
+
+
+def run(code):
+    return GENIAInterpreter().run(code)
+
+
+def test_builtins_without_definitions():
+    assert run("""
+    define double(x) -> x * 2
+    define pos?(x) -> x > 0
+    [reduce(+, 0, 1..100), map(double, [1, 2, 3]), filter(pos?, (-2)..2),
+     count(1..1000000), take(2, [5, 6, 7]), reverse(1..3)]
+    """) == [5050, [2, 4, 6], [1, 2], 1000000, [5, 6], [3, 2, 1]]
+
+
+def test_curried_forms():
+    assert run("""
+    define double(x) -> x * 2
+    define pos?(x) -> x > 0
+    m = map(double)
+    f = filter(pos?)
+    r = reduce(+, 10)
+    t = take(1)
+    rev = reverse()
+    a = any?(pos?)
+    e = every?(pos?)
+    [m([1, 2]), f([-1, 1]), r([1, 2]), t([4, 5]), rev([1, 2]), a([-1, 1]), e([-1, 1])]
+    """) == [[2, 4], [1], 13, [4], [2, 1], True, False]
+
+
+def test_lazy_and_infinite_sequences():
+    assert run("""
+    define inc(x) -> x + 1
+    define iterate(f, v) -> delayseq(v, delay(iterate(f, f(v))))
+    define big?(x) -> x > 3
+    [take(3, iterate(inc, 1)), any?(big?, iterate(inc, 1)), count(delayseq(1, delay([2, 3])))]
+    """) == [[1, 2, 3], True, 3]
+
+
+def test_callbacks_with_guards_and_closures():
+    assert run("""
+    define classify(x) when x > 1 -> "big" | (_) -> "small"
+    n = 2
+    [map(classify, [1, 2]), map(define(x) -> x + n, [1, 2])]
+    """) == [["small", "big"], [3, 4]]
+
+
+def test_user_definitions_override_and_extend():
+    assert run("""
+    TRUE = 1 == 1
+    define count(list) -> 42
+    define map(f, a, b) -> [f(a), f(b)]
+    define any?(_, []) -> TRUE
+    define double(x) -> x * 2
+    [count([1]), map(double, 1, 2), map(double, [3]), any?(double, [])]
+    """) == [42, [2, 4], [6], True]
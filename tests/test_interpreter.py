@@ -1,3 +1,4 @@
+import io
 import pytest
 import sys
 from pathlib import Path
@@ -167,6 +168,20 @@ def test_interpreter_anonymous_multiple_arities(interpreter_fixture):
     
     assert result == 0
 
+def test_interpreter_anonymous_functions_share_template():
+    code = """
+    define adder(n) -> define (x) -> x + n
+    a = adder(1)
+    b = adder(2)
+    [a(10), b(10)]
+    """
+    interpreter = Interpreter()
+    assert interpreter.execute(ast(code)) == [11, 12]
+    a, b = interpreter.environment['a'], interpreter.environment['b']
+    assert a.frame != b.frame
+    assert a.definitions is b.definitions and a._dispatch is b._dispatch
+    assert not [name for name in interpreter.functions if name.startswith('anon_')]
+
 def test_interpreter_function_with_guard_bad_condition(interpreter_fixture):
     code = """
     define foo(x) when x > 10 -> x * 2;
@@ -351,6 +366,45 @@ def test_interpreter___ffi_rem2(interpreter_fixture):
     result = interpreter_fixture.run(code)
     assert 10 == result
 
+def test_interpreter___ffi_resolved_at_definition(interpreter_fixture):
+    import math
+    interpreter_fixture.run('define rem(x,y) -> foreign "math.remainder"')
+    clause = interpreter_fixture.interpreter.functions['rem'].dispatch_table()[2][0]
+    assert clause.body is math.remainder
+    with pytest.raises(RuntimeError, match="Cannot load foreign function 'nosuchmodule.f'"):
+        interpreter_fixture.run('define f(x) -> foreign "nosuchmodule.f"\nprint("not reached")')
+    with pytest.raises(RuntimeError, match="Cannot load foreign function 'math.nope'"):
+        interpreter_fixture.run('define g(x) -> foreign "math.nope"')
+
+def test_interpreter_rest_parameters(interpreter_fixture):
+    code = """
+    define f(0) -> "zero" | (a, ..rest) -> [a, rest] | (a, b) -> "two"
+    [f(0), f(1), f(1, 2), f(1, 2, 3), +(1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12, 13, 14, 15, 16, 17, 18, 19, 20, 21)]
+    """
+    assert interpreter_fixture.run(code) == ["zero", [1, []], [1, [2]], [1, [2, 3]], 231]
+
+def test_interpreter_variadic_dispatch_shares_clause():
+    interpreter = Interpreter()
+    interpreter.execute(ast("define sums(a, b, c) -> [+(a, b), +(a, b, c)]\nsums(1, 2, 3)"))
+    plus = interpreter.functions['+']
+    assert len(plus.definitions) == 1
+    assert plus.clauses_for(2)[0] is plus.clauses_for(3)[0]
+    stdout = io.StringIO()
+    interpreter.execute(ast("print(1, 2, 3, 4, 5, 6, 7, 8, 9)"), stdout=stdout)
+    assert stdout.getvalue() == "1 2 3 4 5 6 7 8 9\n"
+
+def test_interpreter_self_tail_call_in_group_loops(interpreter_fixture, monkeypatch):
+    code = """
+    define count_down(0, acc) -> acc
+    define count_down(n, acc) -> (next = n - 1; count_down(next, acc + 1))
+    count_down(3000, 0)
+    """
+    calls = []
+    call_function = Interpreter.call_function
+    monkeypatch.setattr(Interpreter, 'call_function', lambda self, *a, **k: calls.append(a) or call_function(self, *a, **k))
+    assert interpreter_fixture.run(code) == 3000
+    assert len(calls) <= 1  # the vm engine runs even the first call inline
+
 def test_interpreter_range(interpreter_fixture):
     code = "1..10"
     result = interpreter_fixture.run(code)
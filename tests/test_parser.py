@@ -828,4 +828,42 @@ def test_tail_call():
         }
     ]
 
-    assert strip_metadata(ast) == strip_metadata(expected_ast)
\ No newline at end of file
+    assert strip_metadata(ast) == strip_metadata(expected_ast)
+
+@pytest.mark.parametrize("code, statement_type", [
+    ("x = 1", "assignment"),
+    ("[a, ..rest] = [1, 2]", "assignment"),
+    ("Roll(s, n) = r", "assignment"),
+    ("(x) = 1", "assignment"),
+    ("x == 1", "expression_statement"),
+    ("f(x + 1)", "expression_statement"),
+    ("[1 + 2, 3]", "expression_statement"),
+    ("(x = 1; x)", "expression_statement"),
+])
+def test_statement_assignment_lookahead(code, statement_type):
+    ast = parse(code)
+    assert len(ast) == 1
+    assert ast[0]['type'] == statement_type
+
+
+def test_pattern_lookahead_does_not_consume_tokens():
+    parser = Parser(Lexer("[a, ..b] = c").tokenize())
+    assert parser.pattern_end(0) == 6
+    assert len(parser.tokens) == 8
+
+def test_rest_parameter():
+    ast = Parser(Lexer("define f(a, ..rest) -> rest").tokenize()).parse()
+    parameters = strip_metadata(ast[0]['definitions'][0]['parameters'])
+    assert parameters == [
+        {'type': 'identifier', 'value': 'a'},
+        {'type': 'unary_operator', 'operator': '..', 'operand': {'type': 'identifier', 'value': 'rest'}},
+    ]
+    with pytest.raises(Parser.SyntaxError, match="Rest parameter '..rest' must be the last parameter"):
+        Parser(Lexer("define f(..rest, a) -> rest").tokenize()).parse()
+
+def test_tail_calls_in_grouped_bodies():
+    ast = Parser(Lexer("define f(n) -> (x = g(n); (h(x); f(x)))").tokenize()).parse()
+    assignment, inner = ast[0]['definitions'][0]['body']['statements']
+    assert 'is_tail_call' not in assignment['value']
+    assert 'is_tail_call' not in inner['statements'][0]
+    assert inner['statements'][1]['is_tail_call'] is True
@@ -4,7 +4,16 @@ from pathlib import Path
 # Add project root to path
 sys.path.append(str(Path(__file__).resolve().parent.parent))
 
-from genia.patterns import bind_list_pattern
+from genia.interpreter import GENIAInterpreter
+from genia.lexer import Lexer
+from genia.parser import Parser
+from genia.patterns import bind_list_pattern, compile_parameters
+from genia.seq import IterSeq
+
+
+def clause_parameters(code):
+    ast = Parser(Lexer(f"define f{code} -> 0").tokenize()).parse()
+    return ast[0]['definitions'][0]['parameters']
 
 
 def test_bind_head_tail():
@@ -44,3 +53,152 @@ def test_bind_pre_mid_post():
     env = {}
     bind_list_pattern(pattern, [1, 2, 3], env)
     assert env == {'pre': [], 'mid': 1, 'post': [2, 3]}
+
+
+def test_compiled_parameters_bind_in_one_pass():
+    match = compile_parameters(clause_parameters('(1, [h, ..t], Pair(a, _), x)'))
+    pair = {'ctor': 'Pair', 'values': [7, 8]}
+    assert match([1, [2, 3], pair, 'x']) == {'h': 2, 't': [3], 'a': 7, 'x': 'x'}
+    assert match([2, [2, 3], pair, 'x']) is None
+    assert match([1, [], pair, 'x']) is None
+    assert match([1, [2], {'ctor': 'Other', 'values': [7, 8]}, 'x']) is None
+
+
+def test_compiled_parameters_exact_list_length():
+    match = compile_parameters(clause_parameters('([a, "b"])'))
+    assert match([[1, "b"]]) == {'a': 1}
+    assert match([[1, "b", 2]]) is None
+    assert match(["ab"]) is None
+
+
+def test_compiled_parameters_repeated_name_keeps_last_binding():
+    match = compile_parameters(clause_parameters('([x], x)'))
+    assert match([[1], 2]) == {'x': 2}
+
+
+def test_dispatch_table_split_by_arity():
+    interp = GENIAInterpreter()
+    interp.run("""
+    define f() -> 0
+    define f(1) -> "one" | (n) when n > 10 -> "big" | (_) -> "other"
+    define f(a, b) -> a + b
+    """)
+    func = interp.interpreter.functions['f']
+    table = func.dispatch_table()
+    assert sorted(table) == [0, 1, 2]
+    assert [len(c.definition['parameters']) for c in table[1]] == [1, 1, 1]
+    assert table[2][0].definition['parameters'][0]['value'] == 'a'
+    call = lambda *args: func(interp.interpreter, list(args), None)
+    assert [call(), call(1), call(11), call(5), call(2, 3)] == [0, "one", "big", "other", 5]
+
+
+def test_dispatch_table_rebuilt_after_new_definition():
+    interp = GENIAInterpreter()
+    assert interp.run("define g(0) -> 0\ng(0)") == 0
+    assert interp.run("define g(n) -> n\ng(4)") == 4
+
+
+def test_literal_clauses_are_hash_indexed():
+    interp = GENIAInterpreter()
+    interp.run("""
+    define route("get", k) -> "get"
+        | ("put", k) when k > 0 -> "put"
+        | (cmd, 0) -> "zero"
+        | ("put", _) -> "put-any"
+        | ("del", _) -> "del"
+        | (_, _) -> "unknown"
+    """)
+    func = interp.interpreter.functions['route']
+    index = func.dispatch_table()[2]
+    assert index.position == 0
+    names = lambda clauses: [c.body['value'] for c in clauses]
+    assert names(index.candidates(["put", 1])) == ["put", "zero", "put-any", "unknown"]
+    assert names(index.candidates(["nope", 1])) == ["zero", "unknown"]
+    assert names(index.candidates([[1], 1])) == ["zero", "unknown"]
+    call = lambda *args: func(interp.interpreter, list(args), None)
+    assert [call("put", 1), call("put", 0), call("put", -1), call("del", 1), call("x", 1)] == \
+        ["put", "zero", "put-any", "del", "unknown"]
+
+
+def test_number_literal_index_matches_equal_values():
+    interp = GENIAInterpreter()
+    assert interp.run("""
+    define cons(a, b) -> define () -> 1 | (1) -> a | (2) -> b
+    c = cons(10, 20)
+    [c(), c(1), c(2)]
+    """) == [1, 10, 20]
+
+
+def counting_seq(pulled):
+    def numbers():
+        n = 0
+        while True:
+            pulled.append(n)
+            yield n
+            n += 1
+    return IterSeq(numbers())
+
+
+def test_compiled_list_pattern_touches_only_needed_elements():
+    pulled = []
+    seq = counting_seq(pulled)
+    env = compile_parameters(clause_parameters('([f, ..r])'))([seq])
+    assert env['f'] == 0
+    assert pulled == [0]
+    assert compile_parameters(clause_parameters('([a])'))([seq]) is None
+    assert pulled == [0, 1]
+
+
+def test_search_pattern_stops_at_first_match_in_sequence():
+    pulled = []
+    env = compile_parameters(clause_parameters('([..pre, 3, ..post])'))([counting_seq(pulled)])
+    assert env['pre'] == [0, 1, 2]
+    assert pulled == [0, 1, 2, 3]
+    assert env['post'].first() == 4
+
+
+def test_middle_spread_over_sequence():
+    match = compile_parameters(clause_parameters('([a, ..m, z])'))
+    assert match([IterSeq(iter([1, 2, 3, 4]))]) == {'a': 1, 'm': [2, 3], 'z': 4}
+    assert match([IterSeq(iter([1]))]) is None
+
+
+def test_list_patterns_do_not_force_infinite_sequences():
+    code = """
+    define inc(i) -> i + 1
+    define iterate(f, v) -> delayseq(v, delay(iterate(f, f(v))))
+    define shape([]) -> "empty" | ([a]) -> "one" | ([a, b, ..rest]) -> [a, b]
+    define has_two([..pre, 2, ..post]) -> [pre, post] | (_) -> "missing"
+    [shape(iterate(inc, 1)), has_two(iterate(inc, 1))]
+    """
+    shape, (pre, post) = GENIAInterpreter().run(code)
+    assert shape == [1, 2]
+    assert pre == [1]
+    assert post.first() == 3
+
+
+def test_list_shape_clauses_test_length_once():
+    interp = GENIAInterpreter()
+    interp.run("""
+    define size([]) -> "empty" | ([a]) -> "one" | ([a, b, ..t]) -> "many" | (x) -> "other"
+    """)
+    index = interp.interpreter.functions['size'].dispatch_table()[1]
+    assert (index.kind, index.limit) == ('length', 2)
+    names = lambda clauses: [c.body['value'] for c in clauses]
+    assert names(index.candidates([[]])) == ["empty", "other"]
+    assert names(index.candidates([[1, 2, 3]])) == ["many", "other"]
+    assert names(index.candidates([5])) == ["other"]
+    assert interp.run('[size([]), size([1]), size(1..5), size(lazyseq([1, 2])), size(5)]') == \
+        ["empty", "one", "many", "many", "other"]
+
+
+def test_constructor_clauses_are_indexed():
+    interp = GENIAInterpreter()
+    assert interp.run("""
+    define Shape = Circle(r) | Square(s) | Rect(w, h)
+    define area(Circle(r)) -> 3 * r * r | (Square(s)) -> s * s | (Rect(w, h)) -> w * h | (_) -> 0
+    [area(Circle(2)), area(Square(3)), area(Rect(2, 5)), area(7)]
+    """) == [12, 9, 10, 0]
+    index = interp.interpreter.functions['area'].dispatch_table()[1]
+    assert index.kind == 'constructor'
+    assert sorted(index.by_key) == [('Circle', 1), ('Rect', 2), ('Square', 1)]
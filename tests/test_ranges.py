@@ -0,0 +1,53 @@
+import json
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from genia.interpreter import GENIAInterpreter
+from genia.ranges import Range
+from genia.vector import Vector, materialize
+
+
+def test_range_is_lazy():
+    r = Range(1, 10 ** 12)
+    assert len(r) == 10 ** 12
+    assert r.head() == 1 and r[-1] == 10 ** 12
+    tail = r.tail(5)
+    assert type(tail) is Range and tail.head() == 6
+
+
+def test_range_behaves_like_a_list():
+    r = Range(5, 1)
+    assert list(r) == [5, 4, 3, 2, 1]
+    assert r == [5, 4, 3, 2, 1] and [5, 4, 3, 2, 1] == r
+    assert r == Vector([5, 4, 3, 2, 1]) and Vector([5, 4, 3, 2, 1]) == r
+    assert r != [5, 4] and Range(1, 3) == Range(1, 3)
+    assert r[1:] == [4, 3, 2, 1] and 3 in r
+    assert repr(r) == "[5, 4, 3, 2, 1]"
+    assert Range(3, 3) == [3]
+
+
+def test_operator_returns_range():
+    result = GENIAInterpreter().run("[1..3, 3..1, [0, ..1..3], [7] .. 1..2]")
+    assert type(result[0]) is Range and type(result[1]) is Range
+    assert result == [[1, 2, 3], [3, 2, 1], [0, 1, 2, 3], [7, 1, 2]]
+
+
+def test_patterns_on_large_range():
+    result = GENIAInterpreter().run("""
+    define first3([a, b, c, ..rest]) -> [a, b, c, first(rest)]
+    define first([h, ..t]) -> h
+    define ends([a, ..middle, z]) -> [a, z]
+    define shape([]) -> 0 | ([x]) -> 1 | ([x, y, ..r]) -> 2
+    [first3(1..100000000), ends(1..5), shape(1..1), shape(1..100000000)]
+    """)
+    assert result == [[1, 2, 3, 4], [1, 5], 1, 2]
+
+
+def test_range_materialized_for_foreign_calls():
+    assert materialize([Range(1, 3)]) == [[1, 2, 3]]
+    assert GENIAInterpreter().run("""
+    define json_dumps(o) -> foreign "json.dumps"
+    json_dumps(1..3)
+    """) == json.dumps([1, 2, 3])
@@ -0,0 +1,92 @@
+import io
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from genia.interpreter import GENIAInterpreter
+from genia.resolver import Resolver
+
+
+def parse(code):
+    return GENIAInterpreter().parse(code)
+
+
+def test_locals_get_slots_and_addresses():
+    ast = Resolver().resolve(parse("define add(x) -> define(y) -> (z = x + y; z)"))
+    outer = ast[0]['definitions'][0]
+    inner = outer['body']['definitions'][0]
+    assert outer['locals'] == ['x'] and inner['locals'] == ['y', 'z']
+    assert outer['parameters'][0]['slot'] == 1
+    assignment, result = inner['body']['statements']
+    assert assignment['value']['left']['address'] == (1, 1)
+    assert assignment['value']['right']['address'] == (0, 1)
+    assert assignment['pattern']['slot'] == 2 and result['address'] == (0, 2)
+
+
+def test_globals_are_not_addressed():
+    ast = Resolver(known=['print']).resolve(parse("g = 1\ndefine f(x) -> print(g, x)"))
+    call = ast[1]['definitions'][0]['body']
+    assert 'address' not in call['arguments'][0] and 'address' not in call
+
+
+def test_undefined_names_reported_at_load_time():
+    resolver = Resolver()
+    resolver.resolve(parse("define f(x) -> (nope + missing(x))"))
+    assert resolver.undefined == [
+        "Undefined identifier 'nope' at line 1, column 17",
+        "Undefined function: 'missing' at line 1, column 24",
+    ]
+    stderr = io.StringIO()
+    GENIAInterpreter().run("define f() -> nope\n1", stderr=stderr)
+    # Reported before anything runs (other tests may leave trace() on)
+    assert stderr.getvalue().startswith("Warning: Undefined identifier 'nope' at line 1, column 15\n")
+
+
+def test_frames_keep_closure_semantics():
+    assert GENIAInterpreter().run("""
+    x = "global"
+    define f(a) -> (
+        early = x;
+        x = a;
+        g = define() -> x;
+        x = "later";
+        [early, g(), x]
+    )
+    f("local")
+    """) == ["global", "local", "later"]
+
+
+def test_functions_see_awk_variables():
+    stdout = io.StringIO()
+    GENIAInterpreter().run("""
+    define show() -> print(NR, $1)
+    show()
+    """, awk_mode="whitespace", stdin=io.StringIO("a b\nc d\n"), stdout=stdout)
+    assert stdout.getvalue() == "1 a\n2 c\n"
+
+
+def test_closures_capture_only_free_variables():
+    ast = Resolver().resolve(parse("define f(a, b, c) -> define(x) -> define(y) -> a + y"))
+    middle = ast[0]['definitions'][0]['body']
+    inner = middle['definitions'][0]['body']
+    assert (middle['captured'], middle['captures']) == (['a'], [(0, 1)])
+    assert (inner['captured'], inner['captures']) == (['a'], [(1, 1)])
+    assert inner['definitions'][0]['body']['left']['address'] == (1, 1)
+
+    interpreter = GENIAInterpreter()
+    g = interpreter.run("define f(a, b, c) -> define(x) -> x + b\nf(1, 2, 3)")
+    assert g.frame == [None, 2, ['b']]
+    assert interpreter.run("""
+    define f(a, b) -> define(x) -> define(y) -> [a, x, y]
+    g = f(1, 2)
+    h = g(3)
+    h(4)
+    """) == [1, 3, 4]
+
+
+def test_delays_capture_only_free_variables():
+    assert GENIAInterpreter().run("""
+    define f(a, b) -> (d = delay(a + 1); a = 10; [d, a])
+    f(1, 2)
+    """) == [2, 10]
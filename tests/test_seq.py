@@ -0,0 +1,14 @@
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from genia.seq import IterSeq, count_seq, nth_seq
+
+
+def test_count_and_nth_on_long_sequences():
+    assert count_seq(10, IterSeq(range(5))) == 5
+    assert count_seq(3, IterSeq(range(5))) == 3
+    assert count_seq(100000, IterSeq(range(50000))) == 50000
+    assert nth_seq(0, IterSeq("abc")) == "a"
+    assert nth_seq(49999, IterSeq(range(50000))) == 49999
@@ -0,0 +1,106 @@
+import io
+import json
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from genia.interpreter import GENIAInterpreter
+from genia.patterns import bind_list_pattern
+from genia.vector import Vector, materialize
+
+
+def test_tail_shares_the_list():
+    data = [1, 2, 3, 4]
+    tail = Vector(data, 1).tail(2)
+    assert tail.data is data
+    assert tail.start == 3
+    assert tail == [4]
+    assert Vector(data, 9) == []
+
+
+def test_vector_behaves_like_a_list():
+    v = Vector([1, 2, 3, 4], 1)
+    assert len(v) == 3
+    assert list(v) == [2, 3, 4]
+    assert v[0] == 2 and v[-1] == 4
+    assert v[1:] == [3, 4] and v[:2] == [2, 3]
+    assert 3 in v and 1 not in v
+    assert v == Vector([0, 2, 3, 4], 1)
+    assert v != [2, 3]
+    assert repr(v) == "[2, 3, 4]"
+    assert [0] + v == [0, 2, 3, 4]
+
+
+def test_rest_binding_is_a_view():
+    data = [1, 2, 3]
+    env = {}
+    bind_list_pattern({'type': 'list_pattern', 'elements': [
+        {'type': 'identifier', 'value': 'h'},
+        {'type': 'rest', 'value': 't'},
+    ]}, data, env)
+    assert type(env['t']) is Vector and env['t'].data is data
+
+
+def test_views_work_in_genia_code():
+    stdout = io.StringIO()
+    result = GENIAInterpreter().run("""
+    define sum([]) -> 0 | ([h, ..t]) -> h + sum(t)
+    define second([_, ..t]) -> t
+    t = second([1, 2, 3])
+    print(t)
+    [sum(1..100), [0, ..t], ..t]
+    """, stdout=stdout)
+    assert stdout.getvalue() == "[2, 3]\n"
+    assert result == [5050, [0, 2, 3], 2, 3]
+
+
+def test_materialize_for_foreign_calls():
+    v = Vector([1, [2, Vector([3, 4], 1)]], 0)
+    assert materialize(v) == [1, [2, [4]]]
+    assert type(materialize(v)[1][1]) is list
+    plain = [1, 2]
+    assert materialize(plain) is plain
+    assert GENIAInterpreter().run("""
+    define json_dumps(o) -> foreign "json.dumps"
+    define rest([_, ..t]) -> t
+    json_dumps(rest([1, 2, 3]))
+    """) == json.dumps([2, 3])
+
+
+def test_append_shares_buffer_until_forked():
+    base = Vector([1, 2])
+    a = base.append(3)
+    b = a.append(4)
+    assert b.data is a.data
+    fork = a.append(5)  # a no longer ends at the end of the buffer
+    assert fork.data is not a.data
+    assert (base, a, b, fork) == ([1, 2], [1, 2, 3], [1, 2, 3, 4], [1, 2, 3, 5])
+
+
+def test_wrapped_python_list_is_never_modified():
+    data = [1, 2]
+    assert Vector(data).append(3) == [1, 2, 3]
+    assert data == [1, 2]
+
+
+def test_prepend_shares_front_buffer():
+    v = Vector([3])
+    a = v.prepend(2)
+    b = a.prepend(1)
+    assert b.front is a.front
+    fork = a.prepend(0)
+    assert (v, a, b, fork) == ([3], [2, 3], [1, 2, 3], [0, 2, 3])
+    assert b.tail(1) == [2, 3] and b.tail(2).head() == 3 and b.tail(5) == []
+    assert b[-1] == 3 and b.to_list() == [1, 2, 3]
+
+
+def test_list_literals_build_vectors():
+    result = GENIAInterpreter().run("""
+    define build(0, acc) -> acc | (n, acc) -> build(n - 1, [..acc, n])
+    define rev([], acc) -> acc | ([h, ..t], acc) -> rev(t, [h, ..acc])
+    xs = build(5, [])
+    [xs, rev(xs, []), [0, ..xs, 6], [..xs, ..xs]]
+    """)
+    assert all(type(v) is Vector for v in result)
+    assert result == [[5, 4, 3, 2, 1], [1, 2, 3, 4, 5], [0, 5, 4, 3, 2, 1, 6], [5, 4, 3, 2, 1] * 2]
@@ -0,0 +1,106 @@
+import io
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from genia.interpreter import GENIAInterpreter, Interpreter
+from genia.lexer import Lexer
+from genia.parser import Parser
+from genia.resolver import Resolver
+from genia.vm import Compiler, LOAD_NAME, LOAD_CONST, ADD, EVAL, TAIL_CALL, LOAD_SLOT, LOAD_OUTER, STORE_SLOT
+
+SEQ_PATH = Path(__file__).resolve().parent.parent / 'scripts' / 'seq.genia'
+SEQ_FUNCTIONS = SEQ_PATH.read_text().split('define inc')[0]
+
+
+def parse_expression(code):
+    return Parser(Lexer(code).tokenize()).parse()[0]['expression']
+
+
+def run(code, engine, **kwargs):
+    return GENIAInterpreter(engine=engine).run(code, **kwargs)
+
+
+def test_compile_arithmetic_evaluates_right_first():
+    code = Compiler().compile(parse_expression("a + 1"))
+    assert code.ops[0::2] == [LOAD_CONST, LOAD_NAME, ADD]
+    assert code.consts[code.ops[1]] == 1
+
+
+def test_unsupported_nodes_fall_back_to_tree_walker():
+    code = Compiler().compile(parse_expression("delay(1)"))
+    assert code.ops[0::2] == [EVAL]
+
+
+def test_tail_call_compiles_to_tail_call():
+    ast = Parser(Lexer("define f(n) -> f(n - 1)").tokenize()).parse()
+    body = ast[0]['definitions'][0]['body']
+    assert Compiler().compile(body).ops[-2] == TAIL_CALL
+
+
+def test_locals_compile_to_slot_access():
+    ast = Resolver().resolve(Parser(Lexer("define f(x) -> (y = x + 1; define(z) -> y + z)").tokenize()).parse())
+    first, second = ast[0]['definitions'][0]['body']['statements']
+    assert Compiler().compile(first).ops == [LOAD_CONST, 0, LOAD_SLOT, 1, ADD, 1, STORE_SLOT, 2]
+    inner = Compiler().compile(second['definitions'][0]['body'])
+    assert inner.ops[0::2] == [LOAD_SLOT, LOAD_OUTER, ADD]
+    assert inner.consts[inner.ops[3]] == (1, 1)  # y, the only value the closure captures
+
+
+@pytest.mark.parametrize("code", [
+    "1 + 2 * 3 - 4 / 2",
+    "[1, ..[2, 3], 4]",
+    "[a, ..b] = [1, 2, 3]\n[b, a]",
+    "x = 5\ndefine f(y) -> (z = x + y; z * 2)\nf(3)",
+    "define fact(0) -> 1 | (n) when n > 0 -> n * fact(n - 1)\nfact(10)",
+    "define s(\"X\") -> 1 | (_) -> 2\n[s(\"X\"), s(\"Y\")]",
+    "define Shape = Circle(r) | Square(s)\ndefine area(Circle(r)) -> r * r | (Square(s)) -> s * s\narea(Square(3))",
+    "\"abc\" ~ r\"a.c\"",
+    "d = delay(1 + 2)\nd + 1",
+    "reverse(map(define(x) -> x * 2, filter(define(x) -> x > 3, 1..10)))",
+    "distinct2([1, 1, 2, 3, 2])",
+])
+def test_vm_matches_tree_walker(code):
+    assert run(SEQ_FUNCTIONS + code, 'vm') == run(SEQ_FUNCTIONS + code, 'tree')
+
+
+def test_vm_deep_tail_recursion():
+    code = "define count_down(0) -> 0 | (n) -> count_down(n - 1)\ncount_down(5000)"
+    assert run(code, 'vm') == 0
+
+
+def test_vm_undefined_identifier():
+    with pytest.raises(RuntimeError, match="Undefined identifier 'nope'"):
+        run("nope + 1", 'vm')
+
+
+def test_vm_awk_mode():
+    stdout = io.StringIO()
+    run("print(NR, $1)", 'vm', awk_mode="whitespace", stdin=io.StringIO("a b\nc d\n"), stdout=stdout)
+    assert stdout.getvalue() == "1 a\n2 c\n"
+
+
+def test_unknown_engine():
+    with pytest.raises(ValueError, match="Unknown engine"):
+        Interpreter(engine='jit')
+
+
+def test_engine_from_environment(monkeypatch):
+    monkeypatch.setenv('GENIA_ENGINE', 'vm')
+    assert Interpreter().engine == 'vm'
+
+
+def test_calls_use_heap_stack_not_python_recursion():
+    code = """
+    define sum(0) -> 0
+    define sum(n) -> n + sum(n - 1)
+    define down(0) -> "done"
+    define down(n) -> (m = n - 1; down(m))
+    [sum(20000), down(20000)]
+    """
+    assert run(code, 'vm') == [200010000, "done"]
+    with pytest.raises(RecursionError):
+        run(code, 'tree')